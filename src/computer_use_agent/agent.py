@@ -1,9 +1,14 @@
 """Agent loop for Claude computer use."""
 
 import asyncio
-from typing import Any
+import copy
+import json
+from datetime import datetime
+from functools import cached_property
+from typing import Any, Callable
 
 import anthropic
+import httpx
 from rich.console import Console
 
 from .captcha import CaptchaSolver
@@ -14,6 +19,167 @@ from .tools import BaseTool, BashTool, ComputerTool, CredentialTool, ToolResult
 
 console = Console()
 
+# Connection pool shared by every agent in the process, created on first use
+_shared_http_client: httpx.AsyncClient | None = None
+
+# Kept free of per-run values so it forms a byte-stable prefix for prompt caching.
+# Volatile context (date, display size) is sent in the first user turn instead.
+# Based on Anthropic's reference implementation best practices.
+_SYSTEM_PROMPT = """<SYSTEM_CAPABILITY>
+* You are utilizing an Ubuntu virtual machine running in a Docker container with internet access.
+* The desktop environment is Fluxbox. To open applications, right-click on the desktop to open the Fluxbox menu.
+* Firefox ESR is installed. To open it: right-click desktop → Browsers → Firefox.
+* When using your computer function calls, they take a while to run and send back to you. Where possible/feasible, try to chain multiple of these calls all into one function calls request.
+* When viewing a page it can be helpful to zoom out so that you can see everything on the page. Either that, or make sure you scroll down to see everything before deciding something isn't available.
+</SYSTEM_CAPABILITY>
+
+<IMPORTANT>
+* When using Firefox, if a startup wizard or welcome page appears, IGNORE IT. Do not click any buttons on the wizard. Instead, click directly on the address bar where it says "Search or enter address", and enter the appropriate search term or URL there.
+* After each step, take a screenshot and carefully evaluate if you have achieved the right outcome. Explicitly show your thinking: "I have evaluated step X..." If not correct, try again. Only when you confirm a step was executed correctly should you move on to the next one.
+* Some UI elements (like dropdowns and scrollbars) might be tricky to manipulate using mouse movements. If you experience issues, try using keyboard shortcuts instead.
+</IMPORTANT>
+
+<CREDENTIALS>
+* When you encounter a login form, use the 'credential' tool to request credentials from the user.
+* First request the username: {"credential_type": "username", "service_name": "Service Name"}
+* Then request the password: {"credential_type": "password", "service_name": "Service Name"}
+* For 2FA codes: {"credential_type": "2fa", "service_name": "Service Name"}
+* Never guess or make up credentials. Always use the credential tool to get them from the user.
+</CREDENTIALS>
+
+<CAPTCHA>
+* If you detect a CAPTCHA, describe it and request solving.
+* The system will attempt to solve it automatically.
+* If automatic solving fails, the user will be prompted.
+</CAPTCHA>
+
+<SENSITIVE_ACTIONS>
+Be careful with sensitive actions like clicking submit/confirm buttons, making purchases, deleting content, or changing settings. Always explain what you're about to do before taking these actions.
+</SENSITIVE_ACTIONS>"""
+
+# Per-run context sent ahead of the task in the first user turn
+_DISPLAY_CONTEXT_TEMPLATE = "The display resolution is {width}x{height}."
+_DATE_CONTEXT_TEMPLATE = "The current date is {date}. {display_context}"
+
+# Number of trailing user turns that carry a cache breakpoint. Together with the
+# tools and system breakpoints this stays within the API limit of four.
+_HISTORY_CACHE_BREAKPOINTS = 2
+
+# Only the most recent screenshots are resent; older ones become a placeholder.
+# Stale screenshots are dropped in batches, so the cached history prefix stays
+# byte-identical (and readable from cache) for several turns in between.
+_KEPT_SCREENSHOTS = 2
+_STALE_SCREENSHOT_BATCH = 4
+_OMITTED_SCREENSHOT = {"type": "text", "text": "[prior screenshot omitted]"}
+
+# Rough token cost of a screenshot; text is estimated at ~4 characters per token
+_IMAGE_TOKEN_ESTIMATE = 1500
+
+# Compaction aims to leave the task and kept turns under this fraction of the
+# threshold, so the history has room to grow before the next compaction
+_COMPACTION_LOW_WATER_RATIO = 0.5
+_SUMMARY_PREFIX = "Summary of my earlier progress:\n"
+
+_COMPACTION_PROMPT = """Below is the transcript of earlier steps taken by a computer use agent \
+working on a task. Summarize it concisely for the agent to continue from: what has \
+been done, what was learned about the current state of the screen and applications, \
+and what remains. Never include passwords, 2FA codes or other secret values."""
+
+# Polling interval bounds while waiting on a Message Batch
+_BATCH_POLL_MIN_SECONDS = 20.0
+_BATCH_POLL_MAX_SECONDS = 300.0
+
+
+def _describe_left_click(tool_input: dict[str, Any]) -> str:
+    coord = tool_input.get("coordinate", [0, 0])
+    return f"Click at position ({coord[0]}, {coord[1]})"
+
+
+def _describe_type(tool_input: dict[str, Any]) -> str:
+    text = tool_input.get("text", "")
+    # Mask if it looks like a password (typing after password prompt)
+    if len(text) > 0:
+        return f"Type text: {'*' * len(text)}"
+    return "Type text"
+
+
+# Describers for computer actions, looked up by action name in _describe_action
+_COMPUTER_ACTION_DESCRIBERS: dict[str, Callable[[dict[str, Any]], str]] = {
+    "screenshot": lambda tool_input: "Take a screenshot",
+    "left_click": _describe_left_click,
+    "type": _describe_type,
+    "key": lambda tool_input: f"Press key: {tool_input.get('key', 'unknown')}",
+    "scroll": lambda tool_input: f"Scroll {tool_input.get('scroll_direction', 'down')}",
+}
+
+
+def _canonical(value: Any) -> Any:
+    """Return a copy of a JSON-like value with dict keys sorted recursively.
+
+    Keeps serialized history byte-stable regardless of the key order the model
+    or SDK happened to produce, which matters for prompt cache prefix hits.
+    """
+    if isinstance(value, dict):
+        return {key: _canonical(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def _estimate_tokens(value: Any) -> int:
+    """Roughly estimate the token count of message content."""
+    if isinstance(value, str):
+        return len(value) // 4
+    if isinstance(value, dict):
+        if value.get("type") == "image":
+            return _IMAGE_TOKEN_ESTIMATE
+        return sum(_estimate_tokens(item) for item in value.values())
+    if isinstance(value, list):
+        return sum(_estimate_tokens(item) for item in value)
+    return 0
+
+
+def _render_transcript(messages: list[dict[str, Any]]) -> str:
+    """Render conversation turns as plain text for summarization."""
+    lines = []
+    for message in messages:
+        role = message["role"]
+        content = message["content"]
+        if isinstance(content, str):
+            lines.append(f"{role}: {content}")
+            continue
+
+        for block in content:
+            block_type = block.get("type")
+            if block_type == "text":
+                lines.append(f"{role}: {block['text']}")
+            elif block_type == "tool_use":
+                lines.append(f"{role} called {block['name']}: {json.dumps(block['input'])}")
+            elif block_type == "tool_result":
+                result = block.get("content", "")
+                if isinstance(result, list):
+                    result = " ".join(
+                        part["text"] if part.get("type") == "text" else "[screenshot]"
+                        for part in result
+                    )
+                lines.append(f"tool result: {result}")
+    return "\n".join(lines)
+
+
+def _get_shared_http_client() -> httpx.AsyncClient:
+    """Get the process-wide HTTP/2 client used for Anthropic API calls.
+
+    Sharing one pool avoids a TLS handshake per agent and lets concurrent
+    requests multiplex over the same connection.
+    """
+    global _shared_http_client
+    if _shared_http_client is None:
+        _shared_http_client = anthropic.DefaultAsyncHttpxClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
+    return _shared_http_client
+
 
 class ComputerUseAgent:
     """Agent that uses Claude to control a computer."""
@@ -32,8 +198,11 @@ class ComputerUseAgent:
         self.config = config
         self.docker_container = docker_container
 
-        # Initialize Anthropic client
-        self.client = anthropic.Anthropic(api_key=config.anthropic_api_key)
+        # Config-dependent part of the per-run context, resolved once
+        self._display_context = _DISPLAY_CONTEXT_TEMPLATE.format(
+            width=config.display_width,
+            height=config.display_height,
+        )
 
         # Initialize human-in-the-loop handler (needed by CredentialTool)
         self.human_handler = HumanLoopHandler(mode=config.human_loop_mode)
@@ -51,6 +220,17 @@ class ComputerUseAgent:
             self.bash_tool,
             self.credential_tool,
         ]
+        self._tools_by_name = {tool.name: tool for tool in self.tools}
+        self._tool_locks = {tool.name: asyncio.Lock() for tool in self.tools}
+
+        # Tools are fixed for the life of the agent, so build their definitions once.
+        # The last definition carries an ephemeral cache breakpoint so the whole
+        # tools prefix is cached; copies keep the marker off the tools' own dicts.
+        self._api_tool_definitions = [
+            copy.deepcopy(tool.get_tool_definition()) for tool in self.tools
+        ]
+        if self._api_tool_definitions:
+            self._api_tool_definitions[-1]["cache_control"] = {"type": "ephemeral"}
 
         # Initialize CAPTCHA solver
         self.captcha_solver: CaptchaSolver | None = None
@@ -60,16 +240,33 @@ class ComputerUseAgent:
         # Conversation history
         self.messages: list[dict[str, Any]] = []
 
+    async def aclose(self) -> None:
+        """Release resources held by the tools and the CAPTCHA solver."""
+        for tool in self.tools:
+            await tool.aclose()
+        if self.captcha_solver:
+            await self.captcha_solver.aclose()
+
+    @cached_property
+    def client(self) -> anthropic.AsyncAnthropic:
+        """Get the Anthropic client, created on first use.
+
+        Agents that never run (e.g. discarded after setup) don't pay for client
+        construction. The client is async so inference doesn't block the event
+        loop, and it reuses the process-wide connection pool.
+        """
+        return anthropic.AsyncAnthropic(
+            api_key=self.config.anthropic_api_key,
+            http_client=_get_shared_http_client(),
+        )
+
     def _get_tool_definitions(self) -> list[dict[str, Any]]:
         """Get tool definitions for the API."""
-        return [tool.get_tool_definition() for tool in self.tools]
+        return self._api_tool_definitions
 
     def _get_tool_by_name(self, name: str) -> BaseTool | None:
         """Get a tool by its name."""
-        for tool in self.tools:
-            if tool.name == name:
-                return tool
-        return None
+        return self._tools_by_name.get(name)
 
     async def _execute_tool(
         self,
@@ -89,22 +286,36 @@ class ComputerUseAgent:
         if not tool:
             return ToolResult(error=f"Unknown tool: {tool_name}")
 
-        # Check if we should prompt for confirmation
-        action_desc = self._describe_action(tool_name, tool_input)
-        if self.human_handler.should_prompt_for_action(action_desc):
-            # Take a screenshot first to show context
-            screenshot_result = await self.computer_tool.execute(action="screenshot")
-            screenshot = screenshot_result.base64_image
+        # Calls to the same tool keep their request order (e.g. click then type);
+        # calls to different tools may overlap
+        async with self._tool_locks[tool.name]:
+            # Check if we should prompt for confirmation
+            action_desc = self._describe_action(tool_name, tool_input)
+            if self.human_handler.should_prompt_for_action(action_desc):
+                # Capture a context screenshot while the confirmation prompt renders
+                screenshot_task = asyncio.create_task(
+                    self.computer_tool.execute(action="screenshot")
+                )
+                confirmed = await self.human_handler.prompt_confirmation(
+                    action_desc,
+                    screenshot_base64=self._screenshot_image(screenshot_task),
+                )
+                if not confirmed:
+                    return ToolResult(error="Action cancelled by user")
 
-            confirmed = await self.human_handler.prompt_confirmation(
-                action_desc,
-                screenshot_base64=screenshot,
-            )
-            if not confirmed:
-                return ToolResult(error="Action cancelled by user")
+                # The context capture already is the screenshot Claude asked for
+                if tool_name == "computer" and tool_input.get("action") == "screenshot":
+                    return await screenshot_task
 
-        # Execute the tool
-        return await tool.execute(**tool_input)
+            # Execute the tool
+            return await tool.execute(**tool_input)
+
+    @staticmethod
+    async def _screenshot_image(
+        screenshot_task: "asyncio.Task[ToolResult]",
+    ) -> str | None:
+        """Wait for a pending screenshot and return its base64 image."""
+        return (await screenshot_task).base64_image
 
     def _describe_action(
         self,
@@ -122,24 +333,8 @@ class ComputerUseAgent:
         """
         if tool_name == "computer":
             action = tool_input.get("action", "unknown")
-            if action == "screenshot":
-                return "Take a screenshot"
-            elif action == "left_click":
-                coord = tool_input.get("coordinate", [0, 0])
-                return f"Click at position ({coord[0]}, {coord[1]})"
-            elif action == "type":
-                text = tool_input.get("text", "")
-                # Mask if it looks like a password (typing after password prompt)
-                if len(text) > 0:
-                    return f"Type text: {'*' * len(text)}"
-                return "Type text"
-            elif action == "key":
-                return f"Press key: {tool_input.get('key', 'unknown')}"
-            elif action == "scroll":
-                direction = tool_input.get("scroll_direction", "down")
-                return f"Scroll {direction}"
-            else:
-                return f"Computer action: {action}"
+            describe = _COMPUTER_ACTION_DESCRIBERS.get(action)
+            return describe(tool_input) if describe else f"Computer action: {action}"
         elif tool_name == "bash":
             cmd = tool_input.get("command", "")
             return f"Run command: {cmd[:50]}..." if len(cmd) > 50 else f"Run command: {cmd}"
@@ -234,131 +429,343 @@ class ComputerUseAgent:
             Final response from Claude
         """
         # Add the initial user message
-        self.messages = [{"role": "user", "content": task}]
+        self.messages = [{
+            "role": "user",
+            "content": [
+                {"type": "text", "text": self._dynamic_preamble()},
+                {"type": "text", "text": task},
+            ],
+        }]
 
         self.human_handler.show_status(f"Starting task: {task}")
 
-        system_prompt = self._get_system_prompt()
+        system_prompt = [
+            {
+                "type": "text",
+                "text": _SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
 
         for iteration in range(max_iterations):
             console.print(f"\n[dim]--- Iteration {iteration + 1}/{max_iterations} ---[/dim]")
 
+            self._update_history_cache_markers()
+
+            # When streaming, tool calls start while the response is still arriving
+            tool_tasks: dict[str, asyncio.Task[ToolResult]] = {}
             try:
-                # Call Claude API
-                response = self.client.beta.messages.create(
-                    model=self.config.model,
-                    max_tokens=self.config.max_tokens,
-                    system=system_prompt,
-                    tools=self._get_tool_definitions(),
-                    messages=self.messages,
-                    betas=[self.config.beta_flag],
-                )
-            except anthropic.APIError as e:
+                if self.config.batch_mode:
+                    response = await self._batch_response(system_prompt)
+                    for block in response.content:
+                        self._handle_content_block(block, tool_tasks)
+                else:
+                    response = await self._stream_response(system_prompt, tool_tasks)
+            except anthropic.AnthropicError as e:
+                for task in tool_tasks.values():
+                    task.cancel()
                 self.human_handler.show_error(f"API error: {e}")
                 return f"API error: {e}"
 
-            # Process the response
-            assistant_content = response.content
-            self.messages.append({"role": "assistant", "content": assistant_content})
-
-            # Display any text content from Claude
-            for block in assistant_content:
-                if hasattr(block, "text"):
-                    console.print(f"\n[bold]Claude:[/bold] {block.text}")
-                elif hasattr(block, "thinking"):
-                    self.human_handler.show_thinking(block.thinking)
+            # Process the response in a single pass over its content blocks.
+            # The turn is committed as plain JSON-ready dicts with sorted keys, so
+            # the SDK doesn't re-dump the response models for every later request
+            # and the serialized prefix stays byte-stable.
+            committed_content = []
+            text_parts = []
+            tool_blocks = []
+            for block in response.content:
+                committed_content.append(
+                    _canonical(block.to_dict(mode="json", exclude_none=True))
+                )
+                block_type = block.type
+                if block_type == "text":
+                    text_parts.append(block.text)
+                elif block_type == "tool_use":
+                    tool_blocks.append(block)
+            self.messages.append({"role": "assistant", "content": committed_content})
 
             # Check if we're done (no tool use)
             if response.stop_reason == "end_turn":
-                # Extract final text response
-                final_text = ""
-                for block in assistant_content:
-                    if hasattr(block, "text"):
-                        final_text += block.text
-                return final_text
-
-            # Process tool use requests
+                return "".join(text_parts)
+
+            # Claude emits tool calls as one parallel batch; they are already running
+            # concurrently, so pair the results back up in request order.
+            results = await asyncio.gather(*(tool_tasks[block.id] for block in tool_blocks))
+
             tool_results = []
-            for block in assistant_content:
-                if block.type == "tool_use":
-                    tool_name = block.name
-                    tool_input = block.input
-
-                    console.print(f"\n[cyan]Tool: {tool_name}[/cyan]")
-                    console.print(f"[dim]Input: {tool_input}[/dim]")
-
-                    # Execute the tool
-                    result = await self._execute_tool(tool_name, tool_input)
-
-                    # Format result for API
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": block.id,
-                        "content": result.to_api_result(),
-                        "is_error": result.is_error,
-                    })
-
-                    # Show result status
-                    if result.is_error:
-                        self.human_handler.show_error(f"Tool error: {result.error}")
-                    elif result.output:
-                        # Obscure sensitive credential output for security
-                        is_sensitive = (
-                            tool_name == "credential"
-                            and tool_input.get("credential_type") in ("password", "2fa")
-                        )
-                        display_output = "********" if is_sensitive else result.output
-                        console.print(
-                            f"[green]Result: {display_output[:100]}...[/green]"
-                            if len(display_output or "") > 100
-                            else f"[green]Result: {display_output}[/green]"
-                        )
-                    elif result.base64_image:
-                        console.print("[green]Screenshot captured[/green]")
+            for block, result in zip(tool_blocks, results):
+                tool_name = block.name
+                tool_input = block.input
+
+                # Format result for API
+                tool_results.append({
+                    "type": "tool_result",
+                    "tool_use_id": block.id,
+                    "content": result.to_api_result(),
+                    "is_error": result.is_error,
+                })
+
+                # Show result status
+                if result.is_error:
+                    self.human_handler.show_error(f"Tool error: {result.error}")
+                elif result.output:
+                    # Obscure sensitive credential output for security
+                    is_sensitive = (
+                        tool_name == "credential"
+                        and tool_input.get("credential_type") in ("password", "2fa")
+                    )
+                    display_output = "********" if is_sensitive else result.output
+                    if len(display_output) > 100:
+                        display_output = f"{display_output[:100]}..."
+                    console.print(f"[green]Result: {display_output}[/green]")
+                elif result.base64_image:
+                    console.print("[green]Screenshot captured[/green]")
 
             # Add tool results to conversation
             if tool_results:
                 self.messages.append({"role": "user", "content": tool_results})
+                self._drop_stale_screenshots()
+                await self._compact_history()
 
         self.human_handler.show_error("Maximum iterations reached")
         return "Task incomplete: maximum iterations reached"
 
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for the agent.
+    async def _stream_response(
+        self,
+        system_prompt: list[dict[str, Any]],
+        tool_tasks: dict[str, "asyncio.Task[ToolResult]"],
+    ) -> Any:
+        """Stream the next response from Claude.
+
+        Content blocks are displayed as soon as they complete, and each tool_use
+        block is dispatched immediately instead of waiting for the full message.
+
+        Args:
+            system_prompt: System prompt content blocks
+            tool_tasks: Populated with a running task per tool_use block, keyed by block id
 
-        Based on Anthropic's reference implementation best practices.
+        Returns:
+            The final accumulated message
         """
-        from datetime import datetime
+        async with self.client.beta.messages.stream(
+            model=self.config.model,
+            max_tokens=self.config.max_tokens,
+            system=system_prompt,
+            tools=self._get_tool_definitions(),
+            messages=self.messages,
+            betas=[self.config.beta_flag],
+        ) as stream:
+            async for event in stream:
+                if event.type == "content_block_stop":
+                    self._handle_content_block(event.content_block, tool_tasks)
+
+            return await stream.get_final_message()
+
+    async def _batch_response(self, system_prompt: list[dict[str, Any]]) -> Any:
+        """Get the next response through the Message Batches API.
+
+        Batched requests cost half as much as real-time ones but may take
+        minutes to complete, so this suits offline runs where latency is
+        acceptable. Prompt caching markers are honoured by batch requests too.
 
-        return f"""<SYSTEM_CAPABILITY>
-* You are utilizing an Ubuntu virtual machine with a {self.config.display_width}x{self.config.display_height} display running in a Docker container with internet access.
-* The desktop environment is Fluxbox. To open applications, right-click on the desktop to open the Fluxbox menu.
-* Firefox ESR is installed. To open it: right-click desktop → Browsers → Firefox.
-* When using your computer function calls, they take a while to run and send back to you. Where possible/feasible, try to chain multiple of these calls all into one function calls request.
-* When viewing a page it can be helpful to zoom out so that you can see everything on the page. Either that, or make sure you scroll down to see everything before deciding something isn't available.
-* The current date is {datetime.today().strftime("%A, %B %d, %Y")}.
-</SYSTEM_CAPABILITY>
+        Args:
+            system_prompt: System prompt content blocks
 
-<IMPORTANT>
-* When using Firefox, if a startup wizard or welcome page appears, IGNORE IT. Do not click any buttons on the wizard. Instead, click directly on the address bar where it says "Search or enter address", and enter the appropriate search term or URL there.
-* After each step, take a screenshot and carefully evaluate if you have achieved the right outcome. Explicitly show your thinking: "I have evaluated step X..." If not correct, try again. Only when you confirm a step was executed correctly should you move on to the next one.
-* Some UI elements (like dropdowns and scrollbars) might be tricky to manipulate using mouse movements. If you experience issues, try using keyboard shortcuts instead.
-</IMPORTANT>
+        Returns:
+            The message produced for the single batched request
+        """
+        batch = await self.client.beta.messages.batches.create(
+            requests=[{
+                "custom_id": "agent-turn",
+                "params": {
+                    "model": self.config.model,
+                    "max_tokens": self.config.max_tokens,
+                    "system": system_prompt,
+                    "tools": self._get_tool_definitions(),
+                    "messages": self.messages,
+                },
+            }],
+            betas=[self.config.beta_flag],
+        )
 
-<CREDENTIALS>
-* When you encounter a login form, use the 'credential' tool to request credentials from the user.
-* First request the username: {{"credential_type": "username", "service_name": "Service Name"}}
-* Then request the password: {{"credential_type": "password", "service_name": "Service Name"}}
-* For 2FA codes: {{"credential_type": "2fa", "service_name": "Service Name"}}
-* Never guess or make up credentials. Always use the credential tool to get them from the user.
-</CREDENTIALS>
+        delay = _BATCH_POLL_MIN_SECONDS
+        while batch.processing_status != "ended":
+            self.human_handler.show_status(
+                f"Waiting for batch {batch.id} ({delay:.0f}s)...",
+                style="dim",
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _BATCH_POLL_MAX_SECONDS)
+            batch = await self.client.beta.messages.batches.retrieve(batch.id)
+
+        async for entry in await self.client.beta.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                return entry.result.message
+            raise anthropic.AnthropicError(
+                f"Batch request {entry.result.type}: {getattr(entry.result, 'error', '')}"
+            )
+        raise anthropic.AnthropicError(f"Batch {batch.id} returned no results")
 
-<CAPTCHA>
-* If you detect a CAPTCHA, describe it and request solving.
-* The system will attempt to solve it automatically.
-* If automatic solving fails, the user will be prompted.
-</CAPTCHA>
+    def _handle_content_block(
+        self,
+        block: Any,
+        tool_tasks: dict[str, "asyncio.Task[ToolResult]"],
+    ) -> None:
+        """Display a completed content block and start it if it is a tool call.
 
-<SENSITIVE_ACTIONS>
-Be careful with sensitive actions like clicking submit/confirm buttons, making purchases, deleting content, or changing settings. Always explain what you're about to do before taking these actions.
-</SENSITIVE_ACTIONS>"""
+        Args:
+            block: Completed content block from Claude
+            tool_tasks: Receives a running task for a tool_use block, keyed by block id
+        """
+        if block.type == "text":
+            console.print(f"\n[bold]Claude:[/bold] {block.text}")
+        elif block.type == "thinking":
+            self.human_handler.show_thinking(block.thinking)
+        elif block.type == "tool_use":
+            # Same key order as the committed history, so logs match what is resent
+            tool_input = _canonical(block.input)
+            console.print(f"\n[cyan]Tool: {block.name}[/cyan]")
+            console.print(f"[dim]Input: {tool_input}[/dim]")
+            tool_tasks[block.id] = asyncio.create_task(
+                self._execute_tool(block.name, tool_input)
+            )
+
+    def _drop_stale_screenshots(self) -> None:
+        """Replace all but the latest screenshots in the history with a placeholder.
+
+        Only the newest screenshots are relevant to Claude, but every image in
+        the history is resent (and billed) on each turn. Rewriting an old turn
+        invalidates the cached prefix from that point on, so nothing is dropped
+        until at least _STALE_SCREENSHOT_BATCH screenshots have gone stale.
+        """
+        # (tool_result block, number of images in it), newest first
+        with_images = []
+        for message in reversed(self.messages):
+            if message["role"] != "user" or not isinstance(message["content"], list):
+                continue
+            for block in reversed(message["content"]):
+                content = block.get("content")
+                if block.get("type") != "tool_result" or not isinstance(content, list):
+                    continue
+                images = sum(1 for part in content if part.get("type") == "image")
+                if images:
+                    with_images.append((block, images))
+
+        total = sum(images for _, images in with_images)
+        if total - _KEPT_SCREENSHOTS < _STALE_SCREENSHOT_BATCH:
+            return
+
+        kept = 0
+        for block, images in with_images:
+            if kept + images <= _KEPT_SCREENSHOTS:
+                kept += images
+                continue
+            # Build a new list rather than editing in place, since the content
+            # list may be shared with the ToolResult it came from
+            block["content"] = [
+                _OMITTED_SCREENSHOT if part.get("type") == "image" else part
+                for part in block["content"]
+            ]
+            kept = _KEPT_SCREENSHOTS
+
+    async def _compact_history(self) -> None:
+        """Summarize older turns once the history grows past the token threshold.
+
+        The first user message (task and context) and the most recent turns stay
+        verbatim, so the cached prefix survives; the turns in between are replaced
+        by a summary prepended to the oldest retained assistant message. Cutting
+        at an assistant message keeps every tool_use paired with its tool_result.
+
+        Compaction is skipped when it could not bring the history well below the
+        threshold (the kept turns alone are too large) or when the only thing
+        left to summarize is the previous summary's turn, since either would
+        re-summarize and invalidate the cached prefix on every turn.
+        """
+        threshold = self.config.compaction_threshold_tokens
+        if _estimate_tokens(self.messages) <= threshold:
+            return
+
+        # History is [task, assistant, user, ..., assistant, user], so the tail
+        # of complete turns starts at an assistant message. At least one turn is
+        # kept, since the summary is merged into the oldest kept assistant message.
+        keep_turns = max(self.config.compaction_keep_turns, 1)
+        split = len(self.messages) - 2 * keep_turns
+        if split <= 1:
+            return
+        if split <= 3 and self._is_summary(self.messages[1]):
+            return
+        retained = _estimate_tokens(self.messages[:1]) + _estimate_tokens(self.messages[split:])
+        if retained > threshold * _COMPACTION_LOW_WATER_RATIO:
+            return
+
+        transcript = _render_transcript(self.messages[1:split])
+        try:
+            response = await self.client.messages.create(
+                model=self.config.compaction_model,
+                max_tokens=1024,
+                messages=[{
+                    "role": "user",
+                    "content": f"{_COMPACTION_PROMPT}\n\n<transcript>\n{transcript}\n</transcript>",
+                }],
+            )
+        except anthropic.AnthropicError as e:
+            self.human_handler.show_error(f"History compaction failed: {e}")
+            return
+
+        summary = "".join(block.text for block in response.content if block.type == "text")
+        oldest_kept = self.messages[split]
+        self.messages[1:split + 1] = [{
+            "role": "assistant",
+            "content": [
+                {"type": "text", "text": f"{_SUMMARY_PREFIX}{summary}"},
+                *oldest_kept["content"],
+            ],
+        }]
+        self.human_handler.show_status(f"Compacted {split - 1} earlier messages", style="dim")
+
+    @staticmethod
+    def _is_summary(message: dict[str, Any]) -> bool:
+        """Check whether a message carries a compaction summary.
+
+        Args:
+            message: Message from the history
+
+        Returns:
+            True if the message starts with a summary written by _compact_history
+        """
+        content = message["content"]
+        if not isinstance(content, list) or not content:
+            return False
+        first = content[0]
+        return first.get("type") == "text" and first.get("text", "").startswith(_SUMMARY_PREFIX)
+
+    def _update_history_cache_markers(self) -> None:
+        """Keep cache breakpoints on the most recent user turns only.
+
+        Marks the last content block of the newest user messages with an
+        ephemeral cache_control and strips markers from older ones, so the
+        breakpoints slide forward as the conversation grows.
+        """
+        remaining = _HISTORY_CACHE_BREAKPOINTS
+        for message in reversed(self.messages):
+            if message["role"] != "user" or not isinstance(message["content"], list):
+                continue
+            last_block = message["content"][-1]
+            if remaining > 0:
+                last_block["cache_control"] = {"type": "ephemeral"}
+                remaining -= 1
+            elif last_block.pop("cache_control", None) is None:
+                # Markers are only ever set on the tail, so everything older is clean
+                break
+
+    def _dynamic_preamble(self) -> str:
+        """Get the per-run context that must stay out of the cached system prompt.
+
+        Returns:
+            Short text block prepended to the first user turn
+        """
+        return _DATE_CONTEXT_TEMPLATE.format(
+            date=datetime.today().strftime("%A, %B %d, %Y"),
+            display_context=self._display_context,
+        )
@@ -2,10 +2,15 @@
 
 import asyncio
 import base64
+import inspect
+import json
+import mmap
+import os
+import re
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Coroutine
 
 from capmonstercloudclient import CapMonsterClient, ClientOptions
 from capmonstercloudclient.requests import (
@@ -17,6 +22,28 @@ from capmonstercloudclient.requests import (
 )
 
 
+# Site key extraction patterns used by detect_and_solve
+_RE_V3_RENDER = re.compile(r"render=([a-zA-Z0-9_-]+)")
+_RE_SITEKEY = re.compile(r'data-sitekey=["\']([^"\']+)["\']')
+
+
+def _read_and_b64(image_path: str | Path) -> str:
+    """Read an image file and return its contents base64-encoded.
+
+    Args:
+        image_path: Path to the image file
+
+    Returns:
+        Base64-encoded file contents
+    """
+    with open(image_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        # Encode straight from the mapped file instead of an in-memory copy
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return base64.standard_b64encode(mapped).decode("ascii")
+
+
 class CaptchaType(Enum):
     """Supported CAPTCHA types."""
 
@@ -27,7 +54,27 @@ class CaptchaType(Enum):
     IMAGE_TO_TEXT = "image_to_text"
 
 
-@dataclass
+# Lowercase page markers for each CAPTCHA family. Every marker is matched by a
+# single case-insensitive alternation regex, longest first so the v3 script URL
+# wins over the bare "recaptcha" it contains.
+_CAPTCHA_MARKERS = {
+    "awswaf": CaptchaType.AMAZON_WAF,
+    "recaptcha/api.js?render=": CaptchaType.RECAPTCHA_V3,
+    "g-recaptcha": CaptchaType.RECAPTCHA_V2,
+    "recaptcha": CaptchaType.RECAPTCHA_V2,
+    "cf-turnstile": CaptchaType.TURNSTILE,
+    "turnstile": CaptchaType.TURNSTILE,
+}
+_RE_CAPTCHA_MARKERS = re.compile(
+    "|".join(map(re.escape, sorted(_CAPTCHA_MARKERS, key=len, reverse=True))),
+    re.IGNORECASE,
+)
+
+# Characters of page HTML scanned for markers before falling back to the full page
+_DETECTION_PREFIX_CHARS = 32768
+
+
+@dataclass(slots=True)
 class CaptchaResult:
     """Result from CAPTCHA solving."""
 
@@ -37,9 +84,41 @@ class CaptchaResult:
     captcha_type: CaptchaType | None = None
 
 
+# Prefix of the error reported when solving each CAPTCHA type raises
+_SOLVE_ERROR_PREFIXES = {
+    CaptchaType.AMAZON_WAF: "Amazon WAF CAPTCHA solving failed",
+    CaptchaType.RECAPTCHA_V2: "reCAPTCHA v2 solving failed",
+    CaptchaType.RECAPTCHA_V3: "reCAPTCHA v3 solving failed",
+    CaptchaType.TURNSTILE: "Turnstile solving failed",
+    CaptchaType.IMAGE_TO_TEXT: "Image CAPTCHA solving failed",
+}
+
+
+def _failed(captcha_type: CaptchaType, error: Exception) -> CaptchaResult:
+    """Build the CaptchaResult for a solve attempt that raised.
+
+    Args:
+        captcha_type: Type of CAPTCHA being solved
+        error: The exception raised
+
+    Returns:
+        Failed CaptchaResult describing the error
+    """
+    return CaptchaResult(
+        success=False,
+        error=f"{_SOLVE_ERROR_PREFIXES[captcha_type]}: {str(error)}",
+        captcha_type=captcha_type,
+    )
+
+
 class CaptchaSolver:
     """CAPTCHA solver using CapMonster Cloud API."""
 
+    # Clients shared by every solver using the same API key, and how many
+    # solvers currently hold each one
+    _client_cache: dict[str, CapMonsterClient] = {}
+    _client_refs: dict[str, int] = {}
+
     def __init__(self, api_key: str):
         """Initialize the CAPTCHA solver.
 
@@ -53,10 +132,108 @@ class CaptchaSolver:
     def client(self) -> CapMonsterClient:
         """Get or create the CapMonster client."""
         if self._client is None:
-            options = ClientOptions(api_key=self.api_key)
-            self._client = CapMonsterClient(options=options)
+            client = CaptchaSolver._client_cache.get(self.api_key)
+            if client is None:
+                options = ClientOptions(api_key=self.api_key)
+                client = CapMonsterClient(options=options)
+                CaptchaSolver._client_cache[self.api_key] = client
+            refs = CaptchaSolver._client_refs
+            refs[self.api_key] = refs.get(self.api_key, 0) + 1
+            self._client = client
         return self._client
 
+    async def __aenter__(self) -> "CaptchaSolver":
+        """Create the client up front so every solve in the block shares it."""
+        self.client
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Release the client when leaving the block."""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Release this solver's hold on the CapMonster client for its API key.
+
+        Once the last solver sharing the client releases it, the client is
+        dropped from the shared cache and closed if it supports closing, so
+        the next solve for this key starts with a fresh client.
+        """
+        client, self._client = self._client, None
+        if client is None:
+            return
+        refs = CaptchaSolver._client_refs
+        remaining = refs.pop(self.api_key, 1) - 1
+        if remaining > 0:
+            refs[self.api_key] = remaining
+            return
+        if CaptchaSolver._client_cache.get(self.api_key) is client:
+            del CaptchaSolver._client_cache[self.api_key]
+        close = getattr(client, "close", None)
+        if close is not None:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+
+    @staticmethod
+    def _with_proxy(request: Any, proxy: dict[str, Any] | None) -> Any:
+        """Apply optional proxy settings to a CapMonster request.
+
+        Args:
+            request: CapMonster request to configure
+            proxy: Optional proxy configuration
+
+        Returns:
+            The same request, for chaining
+        """
+        if proxy:
+            request.proxyType = proxy.get("type", "http")
+            request.proxyAddress = proxy.get("address", "")
+            request.proxyPort = proxy.get("port", 0)
+            request.proxyLogin = proxy.get("username", "")
+            request.proxyPassword = proxy.get("password", "")
+        return request
+
+    async def _solve(
+        self,
+        make_request: Callable[[], Any],
+        attr: str | None,
+        captcha_type: CaptchaType,
+    ) -> CaptchaResult:
+        """Submit a CapMonster request and wrap the response.
+
+        Args:
+            make_request: Builds the CapMonster request (errors are reported)
+            attr: Key of the solution dict holding the answer, or None to
+                pass the whole solution dict on as compact JSON
+            captcha_type: Type of CAPTCHA being solved
+
+        Returns:
+            CaptchaResult with solution or error
+        """
+        try:
+            # solve_captcha returns the task's solution dict itself
+            result = await self.client.solve_captcha(make_request())
+            if not result:
+                solution = None
+            elif attr is None:
+                solution = json.dumps(result, separators=(",", ":"))
+            else:
+                solution = result.get(attr)
+            if solution is not None:
+                return CaptchaResult(
+                    success=True,
+                    solution=solution,
+                    captcha_type=captcha_type,
+                )
+            return CaptchaResult(
+                success=False,
+                error="No solution returned from CapMonster",
+                captcha_type=captcha_type,
+            )
+
+        except Exception as e:
+            return _failed(captcha_type, e)
+
     async def solve_amazon_waf(
         self,
         website_url: str,
@@ -81,37 +258,19 @@ class CaptchaSolver:
         Returns:
             CaptchaResult with solution or error
         """
-        try:
-            request = AmazonWafRequest(
+        # The WAF solution is a payload of several tokens; pass it on as JSON
+        return await self._solve(
+            lambda: AmazonWafRequest(
                 websiteUrl=website_url,
                 websiteKey=website_key or "",
                 iv=iv or "",
                 context=context or "",
                 challengeScript=challenge_script or "",
                 captchaScript=captcha_script or "",
-            )
-
-            result = await self.client.solve_captcha(request)
-
-            if result and hasattr(result, "solution"):
-                return CaptchaResult(
-                    success=True,
-                    solution=str(result.solution),
-                    captcha_type=CaptchaType.AMAZON_WAF,
-                )
-            else:
-                return CaptchaResult(
-                    success=False,
-                    error="No solution returned from CapMonster",
-                    captcha_type=CaptchaType.AMAZON_WAF,
-                )
-
-        except Exception as e:
-            return CaptchaResult(
-                success=False,
-                error=f"Amazon WAF CAPTCHA solving failed: {str(e)}",
-                captcha_type=CaptchaType.AMAZON_WAF,
-            )
+            ),
+            None,
+            CaptchaType.AMAZON_WAF,
+        )
 
     async def solve_recaptcha_v2(
         self,
@@ -131,40 +290,15 @@ class CaptchaSolver:
         Returns:
             CaptchaResult with solution token or error
         """
-        try:
-            # RecaptchaV2Request works for both proxy and proxyless
-            request = RecaptchaV2Request(
-                websiteUrl=website_url,
-                websiteKey=website_key,
-            )
-            if proxy:
-                request.proxyType = proxy.get("type", "http")
-                request.proxyAddress = proxy.get("address", "")
-                request.proxyPort = proxy.get("port", 0)
-                request.proxyLogin = proxy.get("username", "")
-                request.proxyPassword = proxy.get("password", "")
-
-            result = await self.client.solve_captcha(request)
-
-            if result and hasattr(result, "gRecaptchaResponse"):
-                return CaptchaResult(
-                    success=True,
-                    solution=result.gRecaptchaResponse,
-                    captcha_type=CaptchaType.RECAPTCHA_V2,
-                )
-            else:
-                return CaptchaResult(
-                    success=False,
-                    error="No solution returned from CapMonster",
-                    captcha_type=CaptchaType.RECAPTCHA_V2,
-                )
-
-        except Exception as e:
-            return CaptchaResult(
-                success=False,
-                error=f"reCAPTCHA v2 solving failed: {str(e)}",
-                captcha_type=CaptchaType.RECAPTCHA_V2,
-            )
+        # RecaptchaV2Request works for both proxy and proxyless
+        return await self._solve(
+            lambda: self._with_proxy(
+                RecaptchaV2Request(websiteUrl=website_url, websiteKey=website_key),
+                proxy,
+            ),
+            "gRecaptchaResponse",
+            CaptchaType.RECAPTCHA_V2,
+        )
 
     async def solve_recaptcha_v3(
         self,
@@ -184,35 +318,16 @@ class CaptchaSolver:
         Returns:
             CaptchaResult with solution token or error
         """
-        try:
-            request = RecaptchaV3ProxylessRequest(
+        return await self._solve(
+            lambda: RecaptchaV3ProxylessRequest(
                 websiteUrl=website_url,
                 websiteKey=website_key,
                 pageAction=page_action,
                 minScore=min_score,
-            )
-
-            result = await self.client.solve_captcha(request)
-
-            if result and hasattr(result, "gRecaptchaResponse"):
-                return CaptchaResult(
-                    success=True,
-                    solution=result.gRecaptchaResponse,
-                    captcha_type=CaptchaType.RECAPTCHA_V3,
-                )
-            else:
-                return CaptchaResult(
-                    success=False,
-                    error="No solution returned from CapMonster",
-                    captcha_type=CaptchaType.RECAPTCHA_V3,
-                )
-
-        except Exception as e:
-            return CaptchaResult(
-                success=False,
-                error=f"reCAPTCHA v3 solving failed: {str(e)}",
-                captcha_type=CaptchaType.RECAPTCHA_V3,
-            )
+            ),
+            "gRecaptchaResponse",
+            CaptchaType.RECAPTCHA_V3,
+        )
 
     async def solve_turnstile(
         self,
@@ -230,40 +345,15 @@ class CaptchaSolver:
         Returns:
             CaptchaResult with solution token or error
         """
-        try:
-            # TurnstileRequest works for both proxy and proxyless
-            request = TurnstileRequest(
-                websiteUrl=website_url,
-                websiteKey=website_key,
-            )
-            if proxy:
-                request.proxyType = proxy.get("type", "http")
-                request.proxyAddress = proxy.get("address", "")
-                request.proxyPort = proxy.get("port", 0)
-                request.proxyLogin = proxy.get("username", "")
-                request.proxyPassword = proxy.get("password", "")
-
-            result = await self.client.solve_captcha(request)
-
-            if result and hasattr(result, "token"):
-                return CaptchaResult(
-                    success=True,
-                    solution=result.token,
-                    captcha_type=CaptchaType.TURNSTILE,
-                )
-            else:
-                return CaptchaResult(
-                    success=False,
-                    error="No solution returned from CapMonster",
-                    captcha_type=CaptchaType.TURNSTILE,
-                )
-
-        except Exception as e:
-            return CaptchaResult(
-                success=False,
-                error=f"Turnstile solving failed: {str(e)}",
-                captcha_type=CaptchaType.TURNSTILE,
-            )
+        # TurnstileRequest works for both proxy and proxyless
+        return await self._solve(
+            lambda: self._with_proxy(
+                TurnstileRequest(websiteUrl=website_url, websiteKey=website_key),
+                proxy,
+            ),
+            "token",
+            CaptchaType.TURNSTILE,
+        )
 
     async def solve_image_captcha(
         self,
@@ -279,41 +369,56 @@ class CaptchaSolver:
         Returns:
             CaptchaResult with recognized text or error
         """
-        try:
-            if image_path and not image_base64:
-                with open(image_path, "rb") as f:
-                    image_base64 = base64.standard_b64encode(f.read()).decode("utf-8")
-
-            if not image_base64:
-                return CaptchaResult(
-                    success=False,
-                    error="No image provided",
-                    captcha_type=CaptchaType.IMAGE_TO_TEXT,
-                )
-
-            request = ImageToTextRequest(body=image_base64)
-            result = await self.client.solve_captcha(request)
+        if image_path and not image_base64:
+            try:
+                image_base64 = await asyncio.to_thread(_read_and_b64, image_path)
+            except Exception as e:
+                return _failed(CaptchaType.IMAGE_TO_TEXT, e)
 
-            if result and hasattr(result, "text"):
-                return CaptchaResult(
-                    success=True,
-                    solution=result.text,
-                    captcha_type=CaptchaType.IMAGE_TO_TEXT,
-                )
-            else:
-                return CaptchaResult(
-                    success=False,
-                    error="No solution returned from CapMonster",
-                    captcha_type=CaptchaType.IMAGE_TO_TEXT,
-                )
-
-        except Exception as e:
+        if not image_base64:
             return CaptchaResult(
                 success=False,
-                error=f"Image CAPTCHA solving failed: {str(e)}",
+                error="No image provided",
                 captcha_type=CaptchaType.IMAGE_TO_TEXT,
             )
 
+        return await self._solve(
+            lambda: ImageToTextRequest(body=image_base64),
+            "text",
+            CaptchaType.IMAGE_TO_TEXT,
+        )
+
+    @staticmethod
+    async def _first_success(
+        candidates: list[Coroutine[Any, Any, CaptchaResult]],
+    ) -> CaptchaResult:
+        """Run solve attempts concurrently and return the first that succeeds.
+
+        Remaining attempts are cancelled once one succeeds. If none succeed,
+        the result of the highest-priority attempt is returned.
+
+        Args:
+            candidates: Solve coroutines in priority order
+
+        Returns:
+            CaptchaResult from the winning (or highest-priority) attempt
+        """
+        tasks = [asyncio.create_task(candidate) for candidate in candidates]
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Prefer the highest-priority success when several finish together
+                for task in tasks:
+                    if task in done and task.result().success:
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        return tasks[0].result()
+
     async def detect_and_solve(
         self,
         website_url: str,
@@ -334,42 +439,57 @@ class CaptchaSolver:
             CaptchaResult with solution or error
         """
         if page_html:
-            html_lower = page_html.lower()
+            # One case-insensitive pass over the page collects every CAPTCHA
+            # family it mentions. Markers almost always sit near the top of the
+            # page, so scan a bounded prefix first and the whole page only if it
+            # misses.
+            markers = _RE_CAPTCHA_MARKERS.findall(page_html, 0, _DETECTION_PREFIX_CHARS)
+            if not markers and len(page_html) > _DETECTION_PREFIX_CHARS:
+                markers = _RE_CAPTCHA_MARKERS.findall(page_html)
+            found = {_CAPTCHA_MARKERS[marker.lower()] for marker in markers}
+
+            # Collect a solve attempt for every CAPTCHA type the page matches,
+            # in priority order
+            candidates = []
 
             # Check for Amazon WAF
-            if "awswaf" in html_lower or "amazon" in website_url.lower():
-                return await self.solve_amazon_waf(website_url)
+            if CaptchaType.AMAZON_WAF in found or "amazon" in website_url.lower():
+                candidates.append(self.solve_amazon_waf(website_url))
 
             # Check for reCAPTCHA v3
-            if "recaptcha/api.js?render=" in html_lower:
+            if CaptchaType.RECAPTCHA_V3 in found:
                 # Extract site key (simplified)
-                import re
-                match = re.search(r'render=([a-zA-Z0-9_-]+)', page_html)
+                match = _RE_V3_RENDER.search(page_html)
                 if match:
-                    return await self.solve_recaptcha_v3(
-                        website_url,
-                        match.group(1),
+                    candidates.append(
+                        self.solve_recaptcha_v3(website_url, match.group(1))
                     )
 
+            # reCAPTCHA v2 and Turnstile share the data-sitekey attribute; search once
+            sitekey_match = None
+            is_recaptcha = (
+                CaptchaType.RECAPTCHA_V2 in found or CaptchaType.RECAPTCHA_V3 in found
+            )
+            is_turnstile = CaptchaType.TURNSTILE in found
+            if is_recaptcha or is_turnstile:
+                sitekey_match = _RE_SITEKEY.search(page_html)
+
             # Check for reCAPTCHA v2
-            if "g-recaptcha" in html_lower or "recaptcha" in html_lower:
-                import re
-                match = re.search(r'data-sitekey=["\']([^"\']+)["\']', page_html)
-                if match:
-                    return await self.solve_recaptcha_v2(
-                        website_url,
-                        match.group(1),
-                    )
+            if is_recaptcha and sitekey_match:
+                candidates.append(
+                    self.solve_recaptcha_v2(website_url, sitekey_match.group(1))
+                )
 
             # Check for Turnstile
-            if "turnstile" in html_lower or "cf-turnstile" in html_lower:
-                import re
-                match = re.search(r'data-sitekey=["\']([^"\']+)["\']', page_html)
-                if match:
-                    return await self.solve_turnstile(
-                        website_url,
-                        match.group(1),
-                    )
+            if is_turnstile and sitekey_match:
+                candidates.append(
+                    self.solve_turnstile(website_url, sitekey_match.group(1))
+                )
+
+            if len(candidates) == 1:
+                return await candidates[0]
+            if candidates:
+                return await self._first_success(candidates)
 
         # If we have a screenshot and couldn't detect type, try image CAPTCHA
         if screenshot_base64:
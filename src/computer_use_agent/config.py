@@ -8,6 +8,10 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 
+# .env files already loaded into os.environ (None is the default lookup)
+_DOTENV_LOADED: set[Path | None] = set()
+
+
 class HumanLoopMode(Enum):
     """Mode for human-in-the-loop interactions."""
 
@@ -16,7 +20,7 @@ class HumanLoopMode(Enum):
     MINIMAL = "minimal"  # Only prompt when explicitly requested
 
 
-@dataclass
+@dataclass(slots=True)
 class Config:
     """Configuration for the computer use agent."""
 
@@ -35,6 +39,15 @@ class Config:
     model: str = "claude-sonnet-4-5"
     max_tokens: int = 4096
 
+    # Route requests through the Message Batches API (50% cheaper, high latency)
+    batch_mode: bool = False
+
+    # History compaction settings: once the estimated history size exceeds the
+    # threshold, older turns are summarized and the most recent turns kept verbatim
+    compaction_threshold_tokens: int = 12000
+    compaction_keep_turns: int = 4
+    compaction_model: str = "claude-haiku-4-5"
+
     # Tool settings
     tool_version: str = "computer_20250124"
     beta_flag: str = "computer-use-2025-01-24"
@@ -42,18 +55,22 @@ class Config:
     @classmethod
     def from_env(cls, env_file: Path | None = None) -> "Config":
         """Load configuration from environment variables."""
-        if env_file:
-            load_dotenv(env_file)
-        else:
-            load_dotenv()
-
-        anthropic_key = os.getenv("ANTHROPIC_API_KEY")
+        # Parse each .env file at most once per process
+        if env_file not in _DOTENV_LOADED:
+            if env_file:
+                load_dotenv(env_file)
+            else:
+                load_dotenv()
+            _DOTENV_LOADED.add(env_file)
+
+        env = os.environ
+        anthropic_key = env.get("ANTHROPIC_API_KEY")
         if not anthropic_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable is required")
 
-        capmonster_key = os.getenv("CAPMONSTER_API_KEY", "")
+        capmonster_key = env.get("CAPMONSTER_API_KEY", "")
 
-        human_loop_str = os.getenv("HUMAN_LOOP_MODE", "sensitive_only")
+        human_loop_str = env.get("HUMAN_LOOP_MODE", "sensitive_only")
         try:
             human_loop_mode = HumanLoopMode(human_loop_str)
         except ValueError:
@@ -62,7 +79,8 @@ class Config:
         return cls(
             anthropic_api_key=anthropic_key,
             capmonster_api_key=capmonster_key,
-            display_width=int(os.getenv("DISPLAY_WIDTH", "1024")),
-            display_height=int(os.getenv("DISPLAY_HEIGHT", "768")),
+            display_width=int(env.get("DISPLAY_WIDTH", "1024")),
+            display_height=int(env.get("DISPLAY_HEIGHT", "768")),
             human_loop_mode=human_loop_mode,
+            batch_mode=env.get("BATCH_MODE", "false").lower() in ("1", "true", "yes"),
         )
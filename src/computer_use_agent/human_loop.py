@@ -3,11 +3,16 @@
 import asyncio
 import base64
 import getpass
+import hashlib
+import inspect
+import re
+import signal
 import tempfile
+import threading
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Callable
+from typing import Any, Awaitable, Callable, TypeVar
 
 from rich.console import Console
 from rich.panel import Panel
@@ -19,6 +24,174 @@ from .config import HumanLoopMode
 
 console = Console()
 
+T = TypeVar("T")
+
+# Keywords that mark an action as sensitive in SENSITIVE_ONLY mode
+_SENSITIVE_KEYWORDS = (
+    "login", "sign in", "signin", "password", "credential",
+    "payment", "purchase", "buy", "checkout", "credit card",
+    "bank", "transfer", "submit", "confirm", "delete",
+    "remove", "unsubscribe", "cancel",
+)
+
+# Matches any sensitive keyword in a single scan
+_SENSITIVE_PATTERN = re.compile(
+    "|".join(map(re.escape, _SENSITIVE_KEYWORDS)),
+    re.IGNORECASE,
+)
+
+# Fixed prompt panel styles, with titles parsed from markup once at import
+_PANEL_CONFIRM_KW = {
+    "title": Text.from_markup("[bold blue]Action Confirmation[/bold blue]"),
+    "border_style": "blue",
+}
+_PANEL_LOGIN_KW = {
+    "title": Text.from_markup("[bold green]Login Required[/bold green]"),
+    "border_style": "green",
+}
+_PANEL_PASSWORD_KW = {
+    "title": Text.from_markup("[bold green]Password Required[/bold green]"),
+    "border_style": "green",
+}
+_PANEL_2FA_KW = {
+    "title": Text.from_markup("[bold cyan]Two-Factor Authentication[/bold cyan]"),
+    "border_style": "cyan",
+}
+_PANEL_CAPTCHA_KW = {
+    "title": Text.from_markup("[bold red]CAPTCHA Required[/bold red]"),
+    "border_style": "red",
+}
+_PANEL_THINKING_KW = {
+    "title": Text.from_markup("[bold yellow]Claude's Reasoning[/bold yellow]"),
+    "border_style": "yellow",
+}
+
+
+def _is_sensitive(action_description: str) -> bool:
+    """Check whether an action description mentions a sensitive keyword."""
+    return _SENSITIVE_PATTERN.search(action_description) is not None
+
+
+# Confirmation check used for each human loop mode
+_MODE_CHECKS: dict[HumanLoopMode, Callable[[str], bool]] = {
+    HumanLoopMode.ALWAYS_CONFIRM: lambda action_description: True,
+    HumanLoopMode.MINIMAL: lambda action_description: False,
+    HumanLoopMode.SENSITIVE_ONLY: _is_sensitive,
+}
+
+
+def _save_temp_image(image_base64: str) -> str:
+    """Decode a base64 image and write it to a temporary PNG file.
+
+    Args:
+        image_base64: Base64-encoded image
+
+    Returns:
+        Path to the temporary file
+    """
+    image_data = base64.standard_b64decode(image_base64)
+    with tempfile.NamedTemporaryFile(
+        suffix=".png",
+        delete=False,
+        prefix="captcha_",
+    ) as f:
+        f.write(image_data)
+        return f.name
+
+
+@dataclass(slots=True)
+class _PromptThread:
+    """A blocking prompt running in a worker thread."""
+
+    ask: Callable[..., Any]
+    thread: threading.Thread
+    # Receives the prompt's (value, error) once the thread returns
+    deliver: Callable[[Any, BaseException | None], None]
+
+
+# Thread of a prompt cancelled with Ctrl+C that is still blocked reading input
+_abandoned_prompt: _PromptThread | None = None
+
+
+def _discard(value: Any, error: BaseException | None) -> None:
+    """Drop the answer of a cancelled prompt."""
+
+
+async def _ask_in_thread(ask: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking console prompt without blocking the event loop.
+
+    The prompt runs in a daemon thread rather than the default executor, so
+    an abandoned prompt cannot keep the process alive. While it waits, Ctrl+C
+    raises KeyboardInterrupt here, as it did when prompts ran on the main
+    thread. The cancelled prompt's thread stays blocked on its read, so the
+    next prompt of the same kind takes over that thread instead of queueing a
+    second reader behind it.
+
+    Args:
+        ask: Blocking prompt function such as Prompt.ask or getpass.getpass
+        *args: Positional arguments for the prompt
+        **kwargs: Keyword arguments for the prompt
+
+    Returns:
+        The value returned by the prompt
+
+    Raises:
+        KeyboardInterrupt: If the user pressed Ctrl+C during the prompt
+    """
+    global _abandoned_prompt
+
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[T] = loop.create_future()
+
+    def resolve(value: Any, error: BaseException | None) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def deliver(value: Any, error: BaseException | None) -> None:
+        try:
+            loop.call_soon_threadsafe(resolve, value, error)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    prompt = _abandoned_prompt
+    # Compare with ==, since a classmethod like Prompt.ask is a new bound
+    # method object on every attribute access
+    if prompt is not None and prompt.ask == ask and prompt.thread.is_alive():
+        prompt.deliver = deliver
+    else:
+        def worker() -> None:
+            value, error = None, None
+            try:
+                value = ask(*args, **kwargs)
+            except BaseException as e:
+                error = e
+            prompt.deliver(value, error)
+
+        prompt = _PromptThread(ask, threading.Thread(target=worker, daemon=True), deliver)
+        prompt.thread.start()
+    _abandoned_prompt = None
+
+    # SIGINT is only delivered to the main thread, so route it to this prompt
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_handler = signal.signal(
+            signal.SIGINT,
+            lambda signum, frame: deliver(None, KeyboardInterrupt()),
+        )
+    try:
+        return await future
+    except KeyboardInterrupt:
+        prompt.deliver = _discard
+        _abandoned_prompt = prompt
+        raise
+    finally:
+        if previous_handler is not None:
+            signal.signal(signal.SIGINT, previous_handler)
+
 
 class InteractionType(Enum):
     """Types of human interactions."""
@@ -31,7 +204,7 @@ class InteractionType(Enum):
     CUSTOM_INPUT = "custom_input"
 
 
-@dataclass
+@dataclass(slots=True)
 class HumanInput:
     """Result from human input."""
 
@@ -56,6 +229,22 @@ class HumanLoopHandler:
         self.mode = mode
         self.on_screenshot = on_screenshot
         self._pending_confirmations: list[str] = []
+        # SHA-256 of displayed base64 images -> temp file they were saved to
+        self._image_cache: dict[str, str] = {}
+        # Prompts run off the event loop, so serialize them to keep
+        # concurrent tools from interleaving on the terminal
+        self._prompt_lock = asyncio.Lock()
+
+    @property
+    def mode(self) -> HumanLoopMode:
+        """How often to prompt for human input."""
+        return self._mode
+
+    @mode.setter
+    def mode(self, mode: HumanLoopMode) -> None:
+        # Resolve the confirmation check once per mode change, not per action
+        self._mode = mode
+        self._check = _MODE_CHECKS[mode]
 
     def should_prompt_for_action(self, action_description: str) -> bool:
         """Determine if we should prompt before an action.
@@ -66,49 +255,40 @@ class HumanLoopHandler:
         Returns:
             True if we should prompt for confirmation
         """
-        if self.mode == HumanLoopMode.ALWAYS_CONFIRM:
-            return True
-
-        if self.mode == HumanLoopMode.MINIMAL:
-            return False
-
-        # SENSITIVE_ONLY mode - check for sensitive actions
-        sensitive_keywords = [
-            "login", "sign in", "signin", "password", "credential",
-            "payment", "purchase", "buy", "checkout", "credit card",
-            "bank", "transfer", "submit", "confirm", "delete",
-            "remove", "unsubscribe", "cancel",
-        ]
-
-        action_lower = action_description.lower()
-        return any(keyword in action_lower for keyword in sensitive_keywords)
+        return self._check(action_description)
 
     async def prompt_confirmation(
         self,
         action_description: str,
-        screenshot_base64: str | None = None,
+        screenshot_base64: str | Awaitable[str | None] | None = None,
     ) -> bool:
         """Prompt the user to confirm an action.
 
         Args:
             action_description: Description of what will happen
-            screenshot_base64: Optional screenshot to show
+            screenshot_base64: Optional screenshot to show, or an awaitable
+                resolving to one (awaited after the prompt panel is rendered)
 
         Returns:
             True if user confirms, False otherwise
         """
-        # Display screenshot if provided and we have a handler
-        if screenshot_base64 and self.on_screenshot:
-            self.on_screenshot(screenshot_base64)
+        async with self._prompt_lock:
+            console.print()
+            console.print(Panel(
+                Text(action_description, style="yellow"),
+                **_PANEL_CONFIRM_KW,
+            ))
 
-        console.print()
-        console.print(Panel(
-            Text(action_description, style="yellow"),
-            title="[bold blue]Action Confirmation[/bold blue]",
-            border_style="blue",
-        ))
+            if inspect.isawaitable(screenshot_base64):
+                screenshot_base64 = await screenshot_base64
 
-        return Confirm.ask("[bold]Proceed with this action?[/bold]", default=True)
+            # Display screenshot if provided and we have a handler
+            if screenshot_base64 and self.on_screenshot:
+                self.on_screenshot(screenshot_base64)
+
+            return await _ask_in_thread(
+                Confirm.ask, "[bold]Proceed with this action?[/bold]", default=True
+            )
 
     async def prompt_username(
         self,
@@ -122,18 +302,18 @@ class HumanLoopHandler:
         Returns:
             HumanInput with the username
         """
-        console.print()
-        console.print(Panel(
-            f"Please enter your username/email for [bold]{service_name}[/bold]",
-            title="[bold green]Login Required[/bold green]",
-            border_style="green",
-        ))
-
-        try:
-            value = Prompt.ask("[bold]Username/Email[/bold]")
-            return HumanInput(value=value)
-        except KeyboardInterrupt:
-            return HumanInput(value="", cancelled=True)
+        async with self._prompt_lock:
+            console.print()
+            console.print(Panel(
+                f"Please enter your username/email for [bold]{service_name}[/bold]",
+                **_PANEL_LOGIN_KW,
+            ))
+
+            try:
+                value = await _ask_in_thread(Prompt.ask, "[bold]Username/Email[/bold]")
+                return HumanInput(value=value)
+            except KeyboardInterrupt:
+                return HumanInput(value="", cancelled=True)
 
     async def prompt_password(
         self,
@@ -147,19 +327,19 @@ class HumanLoopHandler:
         Returns:
             HumanInput with the password
         """
-        console.print()
-        console.print(Panel(
-            f"Please enter your password for [bold]{service_name}[/bold]",
-            title="[bold green]Password Required[/bold green]",
-            border_style="green",
-        ))
-
-        try:
-            # Use getpass for secure password input
-            value = getpass.getpass("Password: ")
-            return HumanInput(value=value)
-        except KeyboardInterrupt:
-            return HumanInput(value="", cancelled=True)
+        async with self._prompt_lock:
+            console.print()
+            console.print(Panel(
+                f"Please enter your password for [bold]{service_name}[/bold]",
+                **_PANEL_PASSWORD_KW,
+            ))
+
+            try:
+                # Use getpass for secure password input
+                value = await _ask_in_thread(getpass.getpass, "Password: ")
+                return HumanInput(value=value)
+            except KeyboardInterrupt:
+                return HumanInput(value="", cancelled=True)
 
     async def prompt_2fa_code(
         self,
@@ -173,19 +353,19 @@ class HumanLoopHandler:
         Returns:
             HumanInput with the 2FA code
         """
-        console.print()
-        console.print(Panel(
-            f"A verification code was sent to [bold]{method}[/bold].\n"
-            "Please enter the code to continue.",
-            title="[bold cyan]Two-Factor Authentication[/bold cyan]",
-            border_style="cyan",
-        ))
-
-        try:
-            value = Prompt.ask("[bold]2FA Code[/bold]")
-            return HumanInput(value=value)
-        except KeyboardInterrupt:
-            return HumanInput(value="", cancelled=True)
+        async with self._prompt_lock:
+            console.print()
+            console.print(Panel(
+                f"A verification code was sent to [bold]{method}[/bold].\n"
+                "Please enter the code to continue.",
+                **_PANEL_2FA_KW,
+            ))
+
+            try:
+                value = await _ask_in_thread(Prompt.ask, "[bold]2FA Code[/bold]")
+                return HumanInput(value=value)
+            except KeyboardInterrupt:
+                return HumanInput(value="", cancelled=True)
 
     async def prompt_captcha(
         self,
@@ -201,25 +381,25 @@ class HumanLoopHandler:
         Returns:
             HumanInput with the CAPTCHA solution
         """
-        console.print()
-
-        # Display the CAPTCHA image if possible
-        image_to_show = captcha_image_base64 or screenshot_base64
-        if image_to_show:
-            await self._display_image(image_to_show, "CAPTCHA Image")
-
-        console.print(Panel(
-            "Please solve the CAPTCHA shown above/in the viewer.\n"
-            "If automated solving failed, enter the solution manually.",
-            title="[bold red]CAPTCHA Required[/bold red]",
-            border_style="red",
-        ))
-
-        try:
-            value = Prompt.ask("[bold]CAPTCHA Solution[/bold]")
-            return HumanInput(value=value)
-        except KeyboardInterrupt:
-            return HumanInput(value="", cancelled=True)
+        async with self._prompt_lock:
+            console.print()
+
+            # Display the CAPTCHA image if possible
+            image_to_show = captcha_image_base64 or screenshot_base64
+            if image_to_show:
+                await self._display_image(image_to_show, "CAPTCHA Image")
+
+            console.print(Panel(
+                "Please solve the CAPTCHA shown above/in the viewer.\n"
+                "If automated solving failed, enter the solution manually.",
+                **_PANEL_CAPTCHA_KW,
+            ))
+
+            try:
+                value = await _ask_in_thread(Prompt.ask, "[bold]CAPTCHA Solution[/bold]")
+                return HumanInput(value=value)
+            except KeyboardInterrupt:
+                return HumanInput(value="", cancelled=True)
 
     async def prompt_custom(
         self,
@@ -237,21 +417,22 @@ class HumanLoopHandler:
         Returns:
             HumanInput with the user's input
         """
-        console.print()
-        console.print(Panel(
-            message,
-            title=f"[bold magenta]{title}[/bold magenta]",
-            border_style="magenta",
-        ))
-
-        try:
-            if is_password:
-                value = getpass.getpass("Input: ")
-            else:
-                value = Prompt.ask("[bold]Input[/bold]")
-            return HumanInput(value=value)
-        except KeyboardInterrupt:
-            return HumanInput(value="", cancelled=True)
+        async with self._prompt_lock:
+            console.print()
+            console.print(Panel(
+                message,
+                title=f"[bold magenta]{title}[/bold magenta]",
+                border_style="magenta",
+            ))
+
+            try:
+                if is_password:
+                    value = await _ask_in_thread(getpass.getpass, "Input: ")
+                else:
+                    value = await _ask_in_thread(Prompt.ask, "[bold]Input[/bold]")
+                return HumanInput(value=value)
+            except KeyboardInterrupt:
+                return HumanInput(value="", cancelled=True)
 
     async def _display_image(
         self,
@@ -268,15 +449,13 @@ class HumanLoopHandler:
             title: Title for the image
         """
         try:
-            # Decode and save to temp file
-            image_data = base64.standard_b64decode(image_base64)
-            with tempfile.NamedTemporaryFile(
-                suffix=".png",
-                delete=False,
-                prefix="captcha_",
-            ) as f:
-                f.write(image_data)
-                temp_path = f.name
+            # Decode and save to temp file off the event loop, reusing the file
+            # from an earlier call when the same image is shown again
+            digest = hashlib.sha256(image_base64.encode("ascii")).hexdigest()
+            temp_path = self._image_cache.get(digest)
+            if temp_path is None:
+                temp_path = await asyncio.to_thread(_save_temp_image, image_base64)
+                self._image_cache[digest] = temp_path
 
             console.print(f"\n[dim]Image saved to: {temp_path}[/dim]")
             console.print("[dim]Open this file to view the image.[/dim]\n")
@@ -321,6 +500,5 @@ class HumanLoopHandler:
         """
         console.print(Panel(
             message,
-            title="[bold yellow]Claude's Reasoning[/bold yellow]",
-            border_style="yellow",
+            **_PANEL_THINKING_KW,
         ))
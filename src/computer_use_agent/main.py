@@ -2,8 +2,11 @@
 
 import argparse
 import asyncio
+import functools
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from rich.console import Console
@@ -15,22 +18,46 @@ from .config import Config, HumanLoopMode
 
 console = Console()
 
+DEFAULT_CONTAINER = "computer-use-desktop"
 
-def check_docker_running() -> bool:
-    """Check if Docker is running and the container exists."""
+# How long to wait for the container after starting it, and how often to check
+_CONTAINER_START_TIMEOUT = 10.0
+_CONTAINER_POLL_INTERVAL = 0.2
+
+
+@functools.lru_cache(maxsize=1)
+def check_docker_running(container: str = DEFAULT_CONTAINER) -> bool:
+    """Check if Docker is running and the container is up.
+
+    Inspects the single container rather than listing every container. The
+    result is cached for the life of the process; call
+    _invalidate_docker_check() after changing the container state.
+
+    Args:
+        container: Name of the Docker container to check
+    """
     try:
         result = subprocess.run(
-            ["docker", "ps", "-q", "-f", "name=computer-use-desktop"],
+            ["docker", "container", "inspect", "-f", "{{.State.Running}}", container],
             capture_output=True,
             text=True,
         )
-        return bool(result.stdout.strip())
+        return result.returncode == 0 and result.stdout.strip() == "true"
     except FileNotFoundError:
         return False
 
 
-def start_docker_container() -> bool:
-    """Start the Docker container if not running."""
+def _invalidate_docker_check() -> None:
+    """Forget the cached result of check_docker_running."""
+    check_docker_running.cache_clear()
+
+
+def start_docker_container(container: str = DEFAULT_CONTAINER) -> bool:
+    """Start the Docker container if not running.
+
+    Args:
+        container: Name of the Docker container expected to come up
+    """
     console.print("[yellow]Docker container not running. Starting...[/yellow]")
     try:
         subprocess.run(
@@ -38,10 +65,15 @@ def start_docker_container() -> bool:
             check=True,
             capture_output=True,
         )
-        # Wait for container to be ready
-        import time
-        time.sleep(5)
-        return check_docker_running()
+        # Poll until the container is up rather than sleeping a fixed time
+        deadline = time.monotonic() + _CONTAINER_START_TIMEOUT
+        while True:
+            _invalidate_docker_check()
+            if check_docker_running(container):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(_CONTAINER_POLL_INTERVAL)
     except subprocess.CalledProcessError as e:
         console.print(f"[red]Failed to start container: {e}[/red]")
         return False
@@ -50,6 +82,18 @@ def start_docker_container() -> bool:
         return False
 
 
+def _warm_up_docker() -> None:
+    """Prime the docker CLI and its daemon connection; errors are ignored."""
+    try:
+        subprocess.run(
+            ["docker", "version", "-f", "{{.Server.Version}}"],
+            capture_output=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+
 def parse_args() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -88,6 +132,12 @@ Examples:
         help="Maximum number of agent loop iterations (default: 50)",
     )
 
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Use the Message Batches API (cheaper, but each turn may take minutes)",
+    )
+
     parser.add_argument(
         "--no-docker-check",
         action="store_true",
@@ -96,8 +146,8 @@ Examples:
 
     parser.add_argument(
         "--container",
-        default="computer-use-desktop",
-        help="Docker container name (default: computer-use-desktop)",
+        default=DEFAULT_CONTAINER,
+        help=f"Docker container name (default: {DEFAULT_CONTAINER})",
     )
 
     parser.add_argument(
@@ -127,6 +177,9 @@ async def run_agent(
         border_style="blue",
     ))
 
+    # Pay the docker CLI's startup cost here rather than in the first action
+    await asyncio.to_thread(_warm_up_docker)
+
     try:
         result = await agent.run(task, max_iterations=max_iterations)
         console.print("\n")
@@ -140,6 +193,8 @@ async def run_agent(
     except Exception as e:
         console.print(f"\n[red]Error: {e}[/red]")
         raise
+    finally:
+        await agent.aclose()
 
 
 def interactive_task_prompt() -> str | None:
@@ -166,7 +221,8 @@ def main() -> None:
     """Main entry point."""
     args = parse_args()
 
-    # Load configuration
+    # Load configuration before anything runs docker, since .env may set
+    # DOCKER_HOST or DOCKER_CONTEXT
     try:
         config = Config.from_env(args.env_file)
     except ValueError as e:
@@ -177,33 +233,44 @@ def main() -> None:
     # Override mode if specified
     if args.mode:
         config.human_loop_mode = HumanLoopMode(args.mode)
+    if args.batch:
+        config.batch_mode = True
 
-    # Check Docker container
-    if not args.no_docker_check:
-        if not check_docker_running():
-            if not start_docker_container():
-                console.print(
-                    "[red]Please start the Docker container first:[/red]\n"
-                    "  docker-compose up -d"
-                )
-                sys.exit(1)
-        console.print("[green]Docker container is running[/green]")
-
-    # Get task
-    task = args.task
-    if not task:
-        task = interactive_task_prompt()
+    # Check the Docker container in the background while the task is entered
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        docker_check = None
+        if not args.no_docker_check:
+            docker_check = pool.submit(check_docker_running, args.container)
+
+        # Get task
+        task = args.task
         if not task:
-            console.print("[yellow]No task provided. Exiting.[/yellow]")
-            sys.exit(0)
+            task = interactive_task_prompt()
+            if not task:
+                console.print("[yellow]No task provided. Exiting.[/yellow]")
+                sys.exit(0)
+
+        # Check Docker container
+        if docker_check is not None:
+            if not docker_check.result():
+                if not start_docker_container(args.container):
+                    console.print(
+                        "[red]Please start the Docker container first:[/red]\n"
+                        "  docker-compose up -d"
+                    )
+                    sys.exit(1)
+            console.print("[green]Docker container is running[/green]")
 
     # Run the agent
-    asyncio.run(run_agent(
-        task=task,
-        config=config,
-        container=args.container,
-        max_iterations=args.max_iterations,
-    ))
+    try:
+        asyncio.run(run_agent(
+            task=task,
+            config=config,
+            container=args.container,
+            max_iterations=args.max_iterations,
+        ))
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Task cancelled by user[/yellow]")
 
 
 if __name__ == "__main__":
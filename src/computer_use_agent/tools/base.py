@@ -2,12 +2,20 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Any
 
 
-@dataclass
+# Fixed parts of the image content block returned for screenshots
+_IMAGE_SOURCE_TEMPLATE = {"type": "base64", "media_type": "image/png"}
+
+
+@dataclass(frozen=True)
 class ToolResult:
-    """Result from executing a tool action."""
+    """Result from executing a tool action.
+
+    Results are immutable, so the API representation is built once and cached.
+    """
 
     output: str | None = None
     error: str | None = None
@@ -25,6 +33,11 @@ class ToolResult:
             Either a string (for simple text) or a list of content blocks
             (for images or mixed content). The API expects one of these two formats.
         """
+        return self.api_result
+
+    @cached_property
+    def api_result(self) -> str | list[dict[str, Any]]:
+        """API-compatible tool result, computed on first access."""
         if self.is_error:
             return self.error or "An error occurred"
 
@@ -35,11 +48,7 @@ class ToolResult:
                 content.append({"type": "text", "text": self.output})
             content.append({
                 "type": "image",
-                "source": {
-                    "type": "base64",
-                    "media_type": "image/png",
-                    "data": self.base64_image,
-                },
+                "source": {**_IMAGE_SOURCE_TEMPLATE, "data": self.base64_image},
             })
             return content
 
@@ -70,3 +79,9 @@ class BaseTool(ABC):
         Override this method for schema-less tools like computer use.
         """
         raise NotImplementedError("Subclass must implement get_tool_definition")
+
+    async def aclose(self) -> None:
+        """Release any resources held by the tool.
+
+        Override this method in tools that keep processes or connections open.
+        """
@@ -1,11 +1,38 @@
 """Bash tool for executing shell commands."""
 
 import asyncio
+import shutil
 from typing import Any
 
 from .base import BaseTool, ToolResult
 
 
+# Most output kept per stream; anything beyond is drained and discarded
+_OUTPUT_LIMIT = 1024 * 1024
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+async def _read_capped(stream: asyncio.StreamReader) -> tuple[bytes, int]:
+    """Read a stream to EOF, keeping at most _OUTPUT_LIMIT bytes.
+
+    Args:
+        stream: Subprocess output stream
+
+    Returns:
+        Tuple of the kept bytes and the number of bytes discarded
+    """
+    kept = bytearray()
+    dropped = 0
+    while chunk := await stream.read(_READ_CHUNK_SIZE):
+        room = _OUTPUT_LIMIT - len(kept)
+        if room >= len(chunk):
+            kept += chunk
+        else:
+            kept += chunk[:room]
+            dropped += len(chunk) - room
+    return bytes(kept), dropped
+
+
 class BashTool(BaseTool):
     """Tool for executing bash commands in the container."""
 
@@ -23,16 +50,27 @@ class BashTool(BaseTool):
         self.docker_container = docker_container
         self.timeout = timeout
 
+        # Command prefix resolved once rather than rebuilt for every command,
+        # with the host-side binary looked up on PATH here instead of per spawn
+        if docker_container:
+            docker = shutil.which("docker") or "docker"
+            self._exec_prefix: tuple[str, ...] = (docker, "exec", docker_container, "bash")
+        else:
+            self._exec_prefix = (shutil.which("bash") or "bash",)
+
+        # Tool definition is static, so build it once
+        self._tool_def: dict[str, Any] = {
+            "type": "bash_20250124",
+            "name": self.name,
+        }
+
     @property
     def name(self) -> str:
         return "bash"
 
     def get_tool_definition(self) -> dict[str, Any]:
         """Get the bash tool definition for the API."""
-        return {
-            "type": "bash_20250124",
-            "name": self.name,
-        }
+        return self._tool_def
 
     async def execute(self, **kwargs: Any) -> ToolResult:
         """Execute a bash command."""
@@ -55,44 +93,44 @@ class BashTool(BaseTool):
 
     async def _run_command(self, command: str) -> ToolResult:
         """Run a bash command."""
-        if self.docker_container:
-            full_cmd = [
-                "docker",
-                "exec",
-                self.docker_container,
-                "bash",
-                "-c",
-                command,
-            ]
-        else:
-            full_cmd = ["bash", "-c", command]
-
         process = await asyncio.create_subprocess_exec(
-            *full_cmd,
+            *self._exec_prefix,
+            "-c",
+            command,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
 
+        assert process.stdout and process.stderr
         try:
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
+            (stdout, stdout_dropped), (stderr, stderr_dropped), _ = await asyncio.wait_for(
+                asyncio.gather(
+                    _read_capped(process.stdout),
+                    _read_capped(process.stderr),
+                    process.wait(),
+                ),
                 timeout=self.timeout,
             )
         except asyncio.TimeoutError:
             process.kill()
             raise
 
-        stdout_str = stdout.decode() if stdout else ""
-        stderr_str = stderr.decode() if stderr else ""
+        # Replace undecodable bytes rather than failing on binary output
+        stdout_str = stdout.decode("utf-8", errors="replace") if stdout else ""
+        stderr_str = stderr.decode("utf-8", errors="replace") if stderr else ""
+        if stdout_dropped:
+            stdout_str += f"\n... [truncated {stdout_dropped} bytes]"
+        if stderr_dropped:
+            stderr_str += f"\n... [truncated {stderr_dropped} bytes]"
 
         # Combine output
-        output_parts = []
-        if stdout_str:
-            output_parts.append(stdout_str)
         if stderr_str:
-            output_parts.append(f"stderr: {stderr_str}")
-
-        output = "\n".join(output_parts) if output_parts else "(no output)"
+            if stdout_str:
+                output = f"{stdout_str}\nstderr: {stderr_str}"
+            else:
+                output = f"stderr: {stderr_str}"
+        else:
+            output = stdout_str or "(no output)"
 
         # Check return code
         if process.returncode != 0:
@@ -2,9 +2,15 @@
 
 import asyncio
 import base64
+import functools
+import os
+import shlex
+import shutil
+import signal
 import subprocess
-from pathlib import Path
-from typing import Any, Literal
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Literal
 
 from .base import BaseTool, ToolResult
 
@@ -29,10 +35,99 @@ ActionType = Literal[
 
 ScrollDirection = Literal["up", "down", "left", "right"]
 
+# Common key names (lowercase) converted to xdotool key names
+_KEY_MAPPING = {
+    "return": "Return",
+    "enter": "Return",
+    "tab": "Tab",
+    "escape": "Escape",
+    "esc": "Escape",
+    "backspace": "BackSpace",
+    "delete": "Delete",
+    "space": "space",
+    "up": "Up",
+    "down": "Down",
+    "left": "Left",
+    "right": "Right",
+    "home": "Home",
+    "end": "End",
+    "pageup": "Page_Up",
+    "pagedown": "Page_Down",
+}
+
+# Modifier names (lowercase) converted to xdotool modifier names
+_MODIFIERS = {
+    "ctrl": "ctrl",
+    "control": "ctrl",
+    "alt": "alt",
+    "shift": "shift",
+    "super": "super",
+    "meta": "meta",
+}
+
+# Scroll directions mapped to xdotool mouse buttons
+_SCROLL_BUTTONS = {
+    "up": "4",
+    "down": "5",
+    "left": "6",
+    "right": "7",
+}
+
+# Captures into a fresh temp file per call, so concurrent screenshots can't
+# clobber each other, and streams the PNG back on stdout
+_SCREENSHOT_SCRIPT = (
+    'f=$(mktemp --suffix=.png) && scrot -o "$f" && cat "$f"; '
+    'rc=$?; rm -f "$f"; exit $rc'
+)
+
+# Text longer than this many characters is typed from stdin instead of argv
+_TYPE_STDIN_THRESHOLD = 4096
+
+# Seconds a command may run before it is killed (one-shot commands such as a
+# screenshot) or the persistent shell is restarted (xdotool actions)
+_EXEC_TIMEOUT = 30.0
+
+# Largest output the persistent shell may produce for a single command
+_SESSION_READ_LIMIT = 16 * 1024 * 1024
+
 
 class ComputerTool(BaseTool):
     """Tool for interacting with a computer display via xdotool and scrot."""
 
+    # Action name -> handler taking (self, kwargs), picking out the kwargs it uses.
+    # Note: Anthropic's schema uses 'text' for the 'type', 'key' and 'hold_key' actions.
+    _DISPATCH: dict[str, Callable[[Any, dict[str, Any]], Awaitable[ToolResult]]] = {
+        "screenshot": lambda self, kw: self._screenshot(),
+        "left_click": lambda self, kw: self._click(kw.get("coordinate"), button=1),
+        "right_click": lambda self, kw: self._click(kw.get("coordinate"), button=3),
+        "middle_click": lambda self, kw: self._click(kw.get("coordinate"), button=2),
+        "double_click": lambda self, kw: self._click(
+            kw.get("coordinate"), button=1, clicks=2
+        ),
+        "triple_click": lambda self, kw: self._click(
+            kw.get("coordinate"), button=1, clicks=3
+        ),
+        "left_click_drag": lambda self, kw: self._drag(
+            kw.get("start_coordinate"),
+            kw.get("end_coordinate"),
+        ),
+        "type": lambda self, kw: self._type(kw.get("text", "")),
+        "key": lambda self, kw: self._key(kw.get("text", "")),
+        "mouse_move": lambda self, kw: self._mouse_move(kw.get("coordinate")),
+        "scroll": lambda self, kw: self._scroll(
+            kw.get("coordinate"),
+            kw.get("scroll_direction", "down"),
+            kw.get("scroll_amount", 3),
+        ),
+        "wait": lambda self, kw: self._wait(kw.get("duration", 1)),
+        "left_mouse_down": lambda self, kw: self._mouse_button("mousedown", 1),
+        "left_mouse_up": lambda self, kw: self._mouse_button("mouseup", 1),
+        "hold_key": lambda self, kw: self._hold_key(
+            kw.get("text", ""),
+            kw.get("duration", 0.5),
+        ),
+    }
+
     def __init__(
         self,
         display_width: int = 1024,
@@ -52,15 +147,32 @@ class ComputerTool(BaseTool):
         self.display_height = display_height
         self.display_num = display_num
         self.docker_container = docker_container
-        self._screenshot_dir = Path("/tmp/screenshots")
-
-    @property
-    def name(self) -> str:
-        return "computer"
 
-    def get_tool_definition(self) -> dict[str, Any]:
-        """Get the computer use tool definition for the API."""
-        return {
+        # Command prefixes resolved once, with the host-side binary looked up on
+        # PATH here instead of on every spawn. DISPLAY is set by env inside the
+        # container, where the X server lives, not on the host.
+        if docker_container:
+            docker = shutil.which("docker") or "docker"
+            exec_prefix: tuple[str, ...] = (docker, "exec", docker_container)
+            session_prefix: tuple[str, ...] = (docker, "exec", "-i", docker_container)
+            env = "env"
+        else:
+            exec_prefix = session_prefix = ()
+            env = shutil.which("env") or "env"
+        display_env = (env, f"DISPLAY=:{display_num}")
+        self._exec_prefix = exec_prefix + display_env
+        self._exec_stdin_prefix = session_prefix + display_env
+        self._session_cmd = self._exec_stdin_prefix + ("bash",)
+
+        # Worker threads for one-shot commands, created on first use
+        self._exec_pool: ThreadPoolExecutor | None = None
+
+        # Long-lived shell that runs xdotool commands, started on first use
+        self._session: asyncio.subprocess.Process | None = None
+        self._session_lock = asyncio.Lock()
+
+        # Tool definition is static, so build it once
+        self._tool_def: dict[str, Any] = {
             "type": "computer_20250124",
             "name": self.name,
             "display_width_px": self.display_width,
@@ -68,111 +180,190 @@ class ComputerTool(BaseTool):
             "display_number": self.display_num,
         }
 
-    async def _run_command(self, cmd: list[str]) -> tuple[str, str, int]:
-        """Run a command, optionally in Docker container."""
-        if self.docker_container:
-            cmd = ["docker", "exec", self.docker_container] + cmd
+    @property
+    def name(self) -> str:
+        return "computer"
+
+    def get_tool_definition(self) -> dict[str, Any]:
+        """Get the computer use tool definition for the API."""
+        return self._tool_def
+
+    async def _exec(
+        self,
+        cmd: list[str],
+        stdin: bytes | None = None,
+    ) -> tuple[bytes, bytes, int]:
+        """Run a command, optionally in Docker container, returning raw output.
 
-        env_cmd = ["env", f"DISPLAY=:{self.display_num}"] + cmd
+        The process is spawned and waited on in a worker thread, so the fork
+        and exec of docker never run on the event loop.
 
-        process = await asyncio.create_subprocess_exec(
-            *env_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+        Args:
+            cmd: Command to run
+            stdin: Optional data fed to the command's standard input
+        """
+        if self._exec_pool is None:
+            self._exec_pool = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="computer-exec"
+            )
+        result = await asyncio.get_running_loop().run_in_executor(
+            self._exec_pool,
+            functools.partial(
+                subprocess.run,
+                [*(self._exec_prefix if stdin is None else self._exec_stdin_prefix), *cmd],
+                input=stdin,
+                stdin=subprocess.DEVNULL if stdin is None else None,
+                capture_output=True,
+                timeout=_EXEC_TIMEOUT,
+            ),
         )
-        stdout, stderr = await process.communicate()
-        return stdout.decode(), stderr.decode(), process.returncode or 0
+        return result.stdout, result.stderr, result.returncode
+
+    async def _run_command(self, cmd: list[str]) -> tuple[str, str, int]:
+        """Run a command in the persistent shell, optionally in Docker container.
+
+        Commands are piped into one long-lived bash process instead of paying
+        for a new process (and docker exec) per action. Each command is
+        followed by a unique sentinel on stdout and stderr that marks the end
+        of its output and carries its exit code.
+        """
+        async with self._session_lock:
+            session = await self._ensure_session()
+            assert session.stdin and session.stdout and session.stderr
+
+            sentinel = f"__done_{uuid.uuid4().hex}__"
+            marker = f"\n{sentinel}".encode()
+            script = (
+                f"{shlex.join(cmd)} </dev/null; __rc=$?; "
+                f"printf '\\n{sentinel}%d\\n' \"$__rc\"; "
+                f"printf '\\n{sentinel}\\n' >&2\n"
+            )
+
+            async def read_stdout() -> tuple[bytes, int]:
+                output = await session.stdout.readuntil(marker)
+                return output, int(await session.stdout.readline())
+
+            async def read_stderr() -> bytes:
+                output = await session.stderr.readuntil(marker)
+                await session.stderr.readline()
+                return output
+
+            async def exchange() -> tuple[tuple[bytes, int], bytes]:
+                session.stdin.write(script.encode())
+                await session.stdin.drain()
+                # Drain both pipes together so a chatty stderr can't stall stdout
+                return await asyncio.gather(read_stdout(), read_stderr())
+
+            try:
+                # Bounded so a hung xdotool or X server can't hold the lock forever
+                (stdout, returncode), stderr = await asyncio.wait_for(
+                    exchange(), _EXEC_TIMEOUT
+                )
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                await self._close_session()
+                raise RuntimeError("Command shell exited unexpectedly") from e
+            except asyncio.TimeoutError as e:
+                await self._close_session()
+                raise RuntimeError(f"Command timed out after {_EXEC_TIMEOUT:.0f}s") from e
+            except BaseException:
+                # The shell is in an unknown state; start a fresh one next time
+                await self._close_session()
+                raise
+
+        stdout, stderr = stdout[: -len(marker)], stderr[: -len(marker)]
+        return stdout.decode(), stderr.decode(), returncode
+
+    async def _ensure_session(self) -> asyncio.subprocess.Process:
+        """Return the persistent shell, starting it if needed."""
+        if self._session is None or self._session.returncode is not None:
+            self._session = await asyncio.create_subprocess_exec(
+                *self._session_cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=_SESSION_READ_LIMIT,
+                # Own process group, so a hung command can be killed with the shell
+                start_new_session=True,
+            )
+        return self._session
+
+    async def _close_session(self) -> None:
+        """Stop the persistent shell if it is running."""
+        session, self._session = self._session, None
+        if session is None or session.returncode is not None:
+            return
+        if session.stdin:
+            session.stdin.close()
+        try:
+            await asyncio.wait_for(session.wait(), timeout=2.0)
+        except asyncio.TimeoutError:
+            # Kill the whole group: a hung child would otherwise keep the pipes
+            # open and wait() would never return
+            try:
+                os.killpg(session.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await session.wait()
+
+    async def aclose(self) -> None:
+        """Shut down the persistent shell and the one-shot command threads."""
+        async with self._session_lock:
+            await self._close_session()
+        pool, self._exec_pool = self._exec_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
 
     async def execute(self, **kwargs: Any) -> ToolResult:
         """Execute a computer action."""
         action: ActionType = kwargs.get("action", "screenshot")
 
+        handler = self._DISPATCH.get(action)
+        if handler is None:
+            return ToolResult(error=f"Unknown action: {action}")
+
         try:
-            if action == "screenshot":
-                return await self._screenshot()
-            elif action == "left_click":
-                return await self._click(kwargs.get("coordinate"), button=1)
-            elif action == "right_click":
-                return await self._click(kwargs.get("coordinate"), button=3)
-            elif action == "middle_click":
-                return await self._click(kwargs.get("coordinate"), button=2)
-            elif action == "double_click":
-                return await self._click(kwargs.get("coordinate"), button=1, clicks=2)
-            elif action == "triple_click":
-                return await self._click(kwargs.get("coordinate"), button=1, clicks=3)
-            elif action == "left_click_drag":
-                return await self._drag(
-                    kwargs.get("start_coordinate"),
-                    kwargs.get("end_coordinate"),
-                )
-            elif action == "type":
-                return await self._type(kwargs.get("text", ""))
-            elif action == "key":
-                # Note: Anthropic's schema uses 'text' for both 'key' and 'type' actions
-                return await self._key(kwargs.get("text", ""))
-            elif action == "mouse_move":
-                return await self._mouse_move(kwargs.get("coordinate"))
-            elif action == "scroll":
-                return await self._scroll(
-                    kwargs.get("coordinate"),
-                    kwargs.get("scroll_direction", "down"),
-                    kwargs.get("scroll_amount", 3),
-                )
-            elif action == "wait":
-                return await self._wait(kwargs.get("duration", 1))
-            elif action == "left_mouse_down":
-                return await self._mouse_button("mousedown", 1)
-            elif action == "left_mouse_up":
-                return await self._mouse_button("mouseup", 1)
-            elif action == "hold_key":
-                # Note: Anthropic's schema uses 'text' for hold_key action
-                return await self._hold_key(
-                    kwargs.get("text", ""),
-                    kwargs.get("duration", 0.5),
-                )
-            else:
-                return ToolResult(error=f"Unknown action: {action}")
+            return await handler(self, kwargs)
         except Exception as e:
             return ToolResult(error=f"Error executing {action}: {str(e)}")
 
     async def _screenshot(self) -> ToolResult:
         """Take a screenshot of the current display."""
-        screenshot_path = "/tmp/screenshot.png"
+        # Take the screenshot and stream the PNG back in a single process, then
+        # base64-encode it here rather than inside the container. scrot picks
+        # the image format from the file extension, so it needs a .png path.
+        stdout, stderr, returncode = await self._exec(["sh", "-c", _SCREENSHOT_SCRIPT])
 
-        # Create directory and take screenshot inside the container
-        mkdir_cmd = ["mkdir", "-p", "/tmp"]
-        await self._run_command(mkdir_cmd)
+        if returncode != 0:
+            return ToolResult(error=f"Screenshot failed: {stderr.decode()}")
+        if not stdout:
+            return ToolResult(error="Screenshot produced no image data")
 
-        # Use scrot to take screenshot
-        cmd = ["scrot", "-o", screenshot_path]
-        stdout, stderr, returncode = await self._run_command(cmd)
+        image_data = base64.standard_b64encode(stdout).decode("ascii")
+        return ToolResult(base64_image=image_data)
 
-        if returncode != 0:
-            return ToolResult(error=f"Screenshot failed: {stderr}")
-
-        # Read the screenshot from inside the container
-        if self.docker_container:
-            # Use docker exec cat to read the file and base64 encode it
-            read_cmd = ["docker", "exec", self.docker_container, "base64", screenshot_path]
-            process = await asyncio.create_subprocess_exec(
-                *read_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+    def _validate_xy(
+        self,
+        coordinate: list[int] | None,
+        name: str = "coordinate",
+    ) -> tuple[tuple[int, int], None] | tuple[None, str]:
+        """Check that a coordinate is an [x, y] pair on the display.
+
+        Args:
+            coordinate: Coordinate from the tool input
+            name: How to refer to the coordinate in the error message
+
+        Returns:
+            Tuple of ((x, y), None) if valid, otherwise (None, error message)
+        """
+        if not coordinate or len(coordinate) != 2:
+            return None, f"Invalid {name} format"
+        x, y = coordinate
+        if not (0 <= x < self.display_width and 0 <= y < self.display_height):
+            return None, (
+                f"Coordinates ({x}, {y}) outside display bounds "
+                f"({self.display_width}x{self.display_height})"
             )
-            stdout_bytes, stderr_bytes = await process.communicate()
-            if process.returncode != 0:
-                return ToolResult(error=f"Failed to read screenshot: {stderr_bytes.decode()}")
-            # Remove newlines from base64 output
-            image_data = stdout_bytes.decode().replace("\n", "")
-            return ToolResult(base64_image=image_data)
-        else:
-            # Local file read
-            try:
-                with open(screenshot_path, "rb") as f:
-                    image_data = base64.standard_b64encode(f.read()).decode("utf-8")
-                return ToolResult(base64_image=image_data)
-            except FileNotFoundError:
-                return ToolResult(error="Screenshot file not found")
+        return (x, y), None
 
     async def _click(
         self,
@@ -181,17 +372,10 @@ class ComputerTool(BaseTool):
         clicks: int = 1,
     ) -> ToolResult:
         """Click at the specified coordinates."""
-        if not coordinate or len(coordinate) != 2:
-            return ToolResult(error="Invalid coordinate format")
-
-        x, y = coordinate
-
-        # Validate coordinates
-        if not (0 <= x < self.display_width and 0 <= y < self.display_height):
-            return ToolResult(
-                error=f"Coordinates ({x}, {y}) outside display bounds "
-                f"({self.display_width}x{self.display_height})"
-            )
+        xy, error = self._validate_xy(coordinate)
+        if error:
+            return ToolResult(error=error)
+        x, y = xy
 
         # Move mouse and click
         cmd = [
@@ -217,13 +401,15 @@ class ComputerTool(BaseTool):
         end_coordinate: list[int] | None,
     ) -> ToolResult:
         """Drag from start to end coordinates."""
-        if not start_coordinate or len(start_coordinate) != 2:
-            return ToolResult(error="Invalid start coordinate format")
-        if not end_coordinate or len(end_coordinate) != 2:
-            return ToolResult(error="Invalid end coordinate format")
+        start, error = self._validate_xy(start_coordinate, "start coordinate")
+        if error:
+            return ToolResult(error=error)
+        end, error = self._validate_xy(end_coordinate, "end coordinate")
+        if error:
+            return ToolResult(error=error)
 
-        x1, y1 = start_coordinate
-        x2, y2 = end_coordinate
+        x1, y1 = start
+        x2, y2 = end
 
         # Move to start, press, move to end, release
         cmd = [
@@ -251,8 +437,17 @@ class ComputerTool(BaseTool):
         if not text:
             return ToolResult(error="No text provided to type")
 
-        cmd = ["xdotool", "type", "--clearmodifiers", "--", text]
-        stdout, stderr, returncode = await self._run_command(cmd)
+        # Type without the default per-key delay. Long text is streamed over
+        # stdin rather than passed as one huge argument.
+        if len(text) > _TYPE_STDIN_THRESHOLD:
+            cmd = ["xdotool", "type", "--clearmodifiers", "--delay", "0", "--file", "-"]
+            stdout_bytes, stderr_bytes, returncode = await self._exec(
+                cmd, stdin=text.encode()
+            )
+            stderr = stderr_bytes.decode("utf-8", errors="replace")
+        else:
+            cmd = ["xdotool", "type", "--clearmodifiers", "--delay", "0", "--", text]
+            stdout, stderr, returncode = await self._run_command(cmd)
 
         if returncode != 0:
             return ToolResult(error=f"Type failed: {stderr}")
@@ -264,43 +459,13 @@ class ComputerTool(BaseTool):
         if not key:
             return ToolResult(error="No key provided")
 
-        # Convert common key names to xdotool format
-        key_mapping = {
-            "return": "Return",
-            "enter": "Return",
-            "tab": "Tab",
-            "escape": "Escape",
-            "esc": "Escape",
-            "backspace": "BackSpace",
-            "delete": "Delete",
-            "space": "space",
-            "up": "Up",
-            "down": "Down",
-            "left": "Left",
-            "right": "Right",
-            "home": "Home",
-            "end": "End",
-            "pageup": "Page_Up",
-            "pagedown": "Page_Down",
-        }
-
-        # Handle key combinations like "ctrl+c"
-        keys = key.split("+")
-        xdotool_keys = []
-        for k in keys:
-            k_lower = k.lower().strip()
-            if k_lower in key_mapping:
-                xdotool_keys.append(key_mapping[k_lower])
-            elif k_lower in ("ctrl", "control"):
-                xdotool_keys.append("ctrl")
-            elif k_lower == "alt":
-                xdotool_keys.append("alt")
-            elif k_lower in ("shift", "super", "meta"):
-                xdotool_keys.append(k_lower)
-            else:
-                xdotool_keys.append(k)
-
-        key_combo = "+".join(xdotool_keys)
+        # Handle key combinations like "ctrl+c", converting common key names
+        # to xdotool format and passing anything else through unchanged
+        key_combo = "+".join([
+            _KEY_MAPPING.get(k_lower) or _MODIFIERS.get(k_lower) or k
+            for k in key.split("+")
+            for k_lower in (k.lower().strip(),)
+        ])
         cmd = ["xdotool", "key", "--clearmodifiers", key_combo]
         stdout, stderr, returncode = await self._run_command(cmd)
 
@@ -311,10 +476,10 @@ class ComputerTool(BaseTool):
 
     async def _mouse_move(self, coordinate: list[int] | None) -> ToolResult:
         """Move mouse to coordinates without clicking."""
-        if not coordinate or len(coordinate) != 2:
-            return ToolResult(error="Invalid coordinate format")
-
-        x, y = coordinate
+        xy, error = self._validate_xy(coordinate)
+        if error:
+            return ToolResult(error=error)
+        x, y = xy
         cmd = ["xdotool", "mousemove", str(x), str(y)]
         stdout, stderr, returncode = await self._run_command(cmd)
 
@@ -330,22 +495,17 @@ class ComputerTool(BaseTool):
         amount: int,
     ) -> ToolResult:
         """Scroll at the specified coordinates."""
-        # Move to coordinates first if provided
-        if coordinate and len(coordinate) == 2:
-            x, y = coordinate
-            move_cmd = ["xdotool", "mousemove", str(x), str(y)]
-            await self._run_command(move_cmd)
-
-        # Map direction to xdotool button
-        button_map = {
-            "up": "4",
-            "down": "5",
-            "left": "6",
-            "right": "7",
-        }
-        button = button_map.get(direction, "5")
-
-        cmd = ["xdotool", "click", "--repeat", str(amount), button]
+        button = _SCROLL_BUTTONS.get(direction, "5")
+
+        # Move to coordinates first if provided, in the same xdotool call
+        cmd = ["xdotool"]
+        if coordinate is not None:
+            xy, error = self._validate_xy(coordinate)
+            if error:
+                return ToolResult(error=error)
+            x, y = xy
+            cmd += ["mousemove", str(x), str(y)]
+        cmd += ["click", "--repeat", str(amount), button]
         stdout, stderr, returncode = await self._run_command(cmd)
 
         if returncode != 0:
@@ -370,13 +530,16 @@ class ComputerTool(BaseTool):
 
     async def _hold_key(self, key: str, duration: float) -> ToolResult:
         """Hold a key for a specified duration."""
-        cmd_down = ["xdotool", "keydown", key]
-        await self._run_command(cmd_down)
-
-        await asyncio.sleep(duration)
+        # Wait out the hold here rather than in xdotool, so long holds aren't cut
+        # off by the command timeout and the key is released even on cancellation
+        _, stderr, returncode = await self._run_command(["xdotool", "keydown", key])
+        if returncode != 0:
+            return ToolResult(error=f"Hold key failed: {stderr}")
 
-        cmd_up = ["xdotool", "keyup", key]
-        stdout, stderr, returncode = await self._run_command(cmd_up)
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            _, stderr, returncode = await self._run_command(["xdotool", "keyup", key])
 
         if returncode != 0:
             return ToolResult(error=f"Hold key failed: {stderr}")
@@ -7,6 +7,16 @@ from .base import BaseTool, ToolResult
 
 CredentialType = Literal["username", "password", "2fa", "custom"]
 
+# Credential type -> prompt coroutine, called as (handler, service_name, custom_message)
+_CRED_DISPATCH = {
+    "username": lambda h, s, m: h.prompt_username(s),
+    "password": lambda h, s, m: h.prompt_password(s),
+    "2fa": lambda h, s, m: h.prompt_2fa_code(),
+    "custom": lambda h, s, m: h.prompt_custom(
+        m or f"Please enter the requested information for {s}"
+    ),
+}
+
 
 class CredentialTool(BaseTool):
     """Tool for requesting credentials from the user.
@@ -23,13 +33,8 @@ class CredentialTool(BaseTool):
         """
         self.human_handler = human_handler
 
-    @property
-    def name(self) -> str:
-        return "credential"
-
-    def get_tool_definition(self) -> dict[str, Any]:
-        """Get the tool definition for the API."""
-        return {
+        # Tool definition is static, so build it once
+        self._tool_def: dict[str, Any] = {
             "name": self.name,
             "description": (
                 "Request credentials from the user for authentication. "
@@ -68,6 +73,14 @@ class CredentialTool(BaseTool):
             },
         }
 
+    @property
+    def name(self) -> str:
+        return "credential"
+
+    def get_tool_definition(self) -> dict[str, Any]:
+        """Get the tool definition for the API."""
+        return self._tool_def
+
     async def execute(self, **kwargs: Any) -> ToolResult:
         """Execute the credential request.
 
@@ -84,17 +97,10 @@ class CredentialTool(BaseTool):
         custom_message: str = kwargs.get("custom_message", "")
 
         try:
-            if credential_type == "username":
-                result = await self.human_handler.prompt_username(service_name)
-            elif credential_type == "password":
-                result = await self.human_handler.prompt_password(service_name)
-            elif credential_type == "2fa":
-                result = await self.human_handler.prompt_2fa_code()
-            elif credential_type == "custom":
-                message = custom_message or f"Please enter the requested information for {service_name}"
-                result = await self.human_handler.prompt_custom(message)
-            else:
+            prompt = _CRED_DISPATCH.get(credential_type)
+            if prompt is None:
                 return ToolResult(error=f"Unknown credential type: {credential_type}")
+            result = await prompt(self.human_handler, service_name, custom_message)
 
             if result.cancelled:
                 return ToolResult(error="User cancelled the credential request")
@@ -0,0 +1,174 @@
+"""Tests for the agent's history management."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from computer_use_agent import agent as agent_module
+from computer_use_agent.agent import ComputerUseAgent
+from computer_use_agent.config import Config
+
+# Each _turn() of the default size estimates at roughly 110 tokens
+THRESHOLD = 1000
+
+
+class FakeMessages:
+    """Stand-in for client.messages that returns a fixed summary."""
+
+    def __init__(self, summary: str):
+        self.summary = summary
+        self.calls: list[dict[str, Any]] = []
+
+    async def create(self, **kwargs: Any) -> SimpleNamespace:
+        self.calls.append(kwargs)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=self.summary)])
+
+
+def _agent(
+    keep_turns: int = 2,
+    summary: str = "SUMMARY",
+) -> tuple[ComputerUseAgent, FakeMessages]:
+    config = Config(
+        anthropic_api_key="test",
+        capmonster_api_key="",
+        compaction_threshold_tokens=THRESHOLD,
+        compaction_keep_turns=keep_turns,
+    )
+    agent = ComputerUseAgent(config)
+    messages = FakeMessages(summary)
+    agent.__dict__["client"] = SimpleNamespace(messages=messages)
+    return agent, messages
+
+
+def _turn(index: int, size: int = 400, image: bool = False) -> list[dict[str, Any]]:
+    """Build one assistant tool_use message and its user tool_result."""
+    content: list[dict[str, Any]] = [{"type": "text", "text": "x" * size}]
+    if image:
+        content.append({"type": "image", "source": {"type": "base64", "data": "QUJD"}})
+    return [
+        {
+            "role": "assistant",
+            "content": [{"type": "tool_use", "id": f"tool-{index}", "name": "bash", "input": {}}],
+        },
+        {
+            "role": "user",
+            "content": [
+                {"type": "tool_result", "tool_use_id": f"tool-{index}", "content": content},
+            ],
+        },
+    ]
+
+
+def _history(turns: int, **turn_kwargs: Any) -> list[dict[str, Any]]:
+    messages = [{"role": "user", "content": "task"}]
+    for index in range(turns):
+        messages += _turn(index, **turn_kwargs)
+    return messages
+
+
+def _assert_paired(messages: list[dict[str, Any]]) -> None:
+    """Check every tool_result answers a tool_use in the message right before it."""
+    for previous, message in zip(messages, messages[1:]):
+        if message["role"] != "user" or not isinstance(message["content"], list):
+            continue
+        tool_use_ids = {
+            block["id"] for block in previous["content"] if block.get("type") == "tool_use"
+        }
+        for block in message["content"]:
+            if block.get("type") == "tool_result":
+                assert block["tool_use_id"] in tool_use_ids
+
+
+def test_compaction_keeps_tool_use_and_result_paired():
+    agent, messages = _agent(keep_turns=2)
+    agent.messages = _history(12)
+
+    asyncio.run(agent._compact_history())
+
+    assert len(messages.calls) == 1
+    # Task, then the two kept turns with the summary merged into the first
+    assert len(agent.messages) == 5
+    assert agent.messages[1]["content"][0]["text"].endswith("SUMMARY")
+    assert agent.messages[1]["content"][1]["id"] == "tool-10"
+    _assert_paired(agent.messages)
+
+
+def test_compaction_skipped_under_threshold():
+    agent, messages = _agent()
+    agent.messages = _history(4)
+
+    asyncio.run(agent._compact_history())
+
+    assert messages.calls == []
+
+
+def test_compaction_skipped_when_kept_turns_exceed_low_water_mark():
+    agent, messages = _agent(keep_turns=2)
+    agent.messages = _history(6) + _turn(6, size=2400)
+    retained = agent_module._estimate_tokens(agent.messages[:1] + agent.messages[-4:])
+    assert retained > THRESHOLD * agent_module._COMPACTION_LOW_WATER_RATIO
+    before = list(agent.messages)
+
+    asyncio.run(agent._compact_history())
+
+    assert messages.calls == []
+    assert agent.messages == before
+
+
+def test_compaction_skipped_when_only_previous_summary_remains():
+    # A long summary keeps the history over the threshold after compacting
+    agent, messages = _agent(keep_turns=1, summary="S" * 4000)
+    agent.messages = _history(12)
+    asyncio.run(agent._compact_history())
+    assert len(messages.calls) == 1
+
+    # The summary's turn is now the only thing before the kept turn
+    agent.messages += _turn(12)
+    asyncio.run(agent._compact_history())
+
+    assert len(messages.calls) == 1
+
+
+@pytest.mark.parametrize("keep_turns", [0, -1])
+def test_compaction_keeps_at_least_one_turn(keep_turns):
+    agent, messages = _agent(keep_turns=keep_turns)
+    agent.messages = _history(12)
+
+    asyncio.run(agent._compact_history())
+
+    assert len(messages.calls) == 1
+    assert len(agent.messages) == 3
+    _assert_paired(agent.messages)
+
+
+def _image_count(messages: list[dict[str, Any]]) -> int:
+    return sum(
+        part.get("type") == "image"
+        for message in messages
+        if isinstance(message["content"], list)
+        for block in message["content"]
+        for part in block.get("content", [])
+        if isinstance(part, dict)
+    )
+
+
+def test_stale_screenshots_dropped_in_batches():
+    agent, _ = _agent()
+    agent.messages = [{"role": "user", "content": "task"}]
+    kept = agent_module._KEPT_SCREENSHOTS
+    batch = kept + agent_module._STALE_SCREENSHOT_BATCH
+
+    counts = []
+    for index in range(batch + 1):
+        agent.messages += _turn(index, image=True)
+        agent._drop_stale_screenshots()
+        counts.append(_image_count(agent.messages))
+
+    # Images accumulate untouched until a full batch is stale, then drop at once
+    assert counts[:batch - 1] == list(range(1, batch))
+    assert counts[batch - 1] == kept
+    assert counts[batch] == kept + 1
+    # The newest screenshots are the ones kept
+    assert _image_count(agent.messages[-2 * kept:]) == kept
@@ -0,0 +1,89 @@
+"""Tests for the CapMonster-backed CAPTCHA solver."""
+
+import asyncio
+from typing import Any
+
+from computer_use_agent.captcha import CaptchaSolver, CaptchaType
+
+
+class FakeClient:
+    """Stand-in for CapMonsterClient returning a fixed solution dict."""
+
+    def __init__(self, solution: dict[str, Any] | None):
+        self.solution = solution
+        self.requests: list[Any] = []
+
+    async def solve_captcha(self, request: Any) -> dict[str, Any] | None:
+        self.requests.append(request)
+        return self.solution
+
+
+def _solver(solution: dict[str, Any] | None) -> CaptchaSolver:
+    solver = CaptchaSolver("test-key")
+    solver._client = FakeClient(solution)
+    return solver
+
+
+def test_recaptcha_v2_reads_solution_dict():
+    solver = _solver({"gRecaptchaResponse": "token-123"})
+
+    result = asyncio.run(solver.solve_recaptcha_v2("https://example.com", "site-key"))
+
+    assert result.success
+    assert result.solution == "token-123"
+    assert result.captcha_type == CaptchaType.RECAPTCHA_V2
+
+
+def test_missing_solution_key_is_an_error():
+    solver = _solver({"unexpected": "value"})
+
+    result = asyncio.run(solver.solve_recaptcha_v3("https://example.com", "site-key"))
+
+    assert not result.success
+    assert result.error == "No solution returned from CapMonster"
+
+
+def test_empty_response_is_an_error():
+    solver = _solver(None)
+
+    result = asyncio.run(solver.solve_recaptcha_v2("https://example.com", "site-key"))
+
+    assert not result.success
+    assert result.error == "No solution returned from CapMonster"
+
+
+def test_amazon_waf_solution_is_json_encoded():
+    solver = _solver({"cookies": {"aws-waf-token": "abc"}, "userAgent": "UA"})
+
+    result = asyncio.run(solver.solve_amazon_waf("https://example.com", "site-key"))
+
+    assert result.success
+    assert result.solution == '{"cookies":{"aws-waf-token":"abc"},"userAgent":"UA"}'
+    assert result.captcha_type == CaptchaType.AMAZON_WAF
+
+
+def test_shared_client_closed_by_last_solver_only():
+    first = CaptchaSolver("shared-key")
+    second = CaptchaSolver("shared-key")
+    assert first.client is second.client
+
+    closed = []
+    first.client.close = lambda: closed.append(True)
+
+    asyncio.run(first.aclose())
+    assert not closed
+    assert CaptchaSolver._client_cache["shared-key"] is second.client
+
+    asyncio.run(second.aclose())
+    assert closed == [True]
+    assert "shared-key" not in CaptchaSolver._client_cache
+
+
+def test_repeat_solve_requests_a_fresh_token():
+    solver = _solver({"gRecaptchaResponse": "token-123"})
+
+    for _ in range(2):
+        asyncio.run(solver.solve_recaptcha_v2("https://example.com", "site-key"))
+
+    # Tokens are single-use, so each solve must go to CapMonster
+    assert len(solver._client.requests) == 2
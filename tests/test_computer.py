@@ -0,0 +1,173 @@
+"""Tests for the computer tool, run locally against a fake xdotool."""
+
+import asyncio
+import base64
+import re
+import stat
+from pathlib import Path
+
+import pytest
+
+from computer_use_agent.tools import computer
+from computer_use_agent.tools.computer import ComputerTool
+
+FAKE_XDOTOOL = """#!/bin/sh
+echo "$@" >> "{log}"
+"""
+
+# Writes its output in two steps, so captures sharing a file would interleave
+FAKE_SCROT = """#!/bin/sh
+printf "PNG-$$-" > "$2"
+sleep 0.2
+printf "end" >> "$2"
+"""
+
+
+@pytest.fixture
+def bin_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Put an empty directory for fake executables at the front of PATH."""
+    path = tmp_path / "bin"
+    path.mkdir()
+    monkeypatch.setenv("PATH", f"{path}:/usr/bin:/bin")
+    return path
+
+
+def _install(bin_dir: Path, name: str, script: str) -> None:
+    executable = bin_dir / name
+    executable.write_text(script)
+    executable.chmod(executable.stat().st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def xdotool_log(tmp_path: Path, bin_dir: Path) -> Path:
+    """Install a fake xdotool that logs its arguments, one call per line."""
+    log = tmp_path / "xdotool.log"
+    _install(bin_dir, "xdotool", FAKE_XDOTOOL.format(log=log))
+    return log
+
+
+def test_hold_key_longer_than_command_timeout(xdotool_log, monkeypatch):
+    monkeypatch.setattr(computer, "_EXEC_TIMEOUT", 0.2)
+
+    async def run():
+        tool = ComputerTool()
+        try:
+            return await tool.execute(action="hold_key", text="shift", duration=0.5)
+        finally:
+            await tool.aclose()
+
+    result = asyncio.run(run())
+
+    assert result.error is None
+    assert xdotool_log.read_text().splitlines() == ["keydown shift", "keyup shift"]
+
+
+def test_hold_key_releases_key_when_cancelled(xdotool_log):
+    async def run():
+        tool = ComputerTool()
+        task = asyncio.create_task(tool.execute(action="hold_key", text="a", duration=30))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await tool.aclose()
+
+    asyncio.run(run())
+
+    assert xdotool_log.read_text().splitlines() == ["keydown a", "keyup a"]
+
+
+def test_concurrent_screenshots_do_not_share_a_file(bin_dir):
+    _install(bin_dir, "scrot", FAKE_SCROT)
+
+    async def run():
+        tool = ComputerTool()
+        try:
+            return await asyncio.gather(
+                tool.execute(action="screenshot"),
+                tool.execute(action="screenshot"),
+            )
+        finally:
+            await tool.aclose()
+
+    results = asyncio.run(run())
+
+    images = [base64.standard_b64decode(result.base64_image).decode() for result in results]
+    assert all(re.fullmatch(r"PNG-\d+-end", image) for image in images), images
+    assert images[0] != images[1]
+
+
+def _run_in_tool(coro_fn):
+    """Run a coroutine function against a fresh local ComputerTool."""
+
+    async def run():
+        tool = ComputerTool()
+        try:
+            return await coro_fn(tool)
+        finally:
+            await tool.aclose()
+
+    return asyncio.run(run())
+
+
+def test_run_command_returns_output_and_exit_code():
+    result = _run_in_tool(
+        lambda tool: tool._run_command(["sh", "-c", "echo out; echo err >&2; exit 3"])
+    )
+
+    assert result == ("out\n", "err\n", 3)
+
+
+def test_run_command_quotes_arguments():
+    text = "line one\nline 'two' \"three\" $HOME `date` \\ ;"
+
+    stdout, _, returncode = _run_in_tool(lambda tool: tool._run_command(["printf", "%s", text]))
+
+    assert returncode == 0
+    assert stdout == text
+
+
+def test_run_command_drains_large_stderr():
+    cmd = ["sh", "-c", "head -c 200000 /dev/zero | tr '\\0' x >&2; echo done"]
+
+    stdout, stderr, returncode = _run_in_tool(lambda tool: tool._run_command(cmd))
+
+    assert (stdout, returncode) == ("done\n", 0)
+    assert stderr == "x" * 200000
+
+
+def test_concurrent_run_commands_get_their_own_output():
+    async def run(tool):
+        return await asyncio.gather(*(
+            tool._run_command(["sh", "-c", f"sleep 0.0{i}; echo {i}; exit {i}"])
+            for i in range(5)
+        ))
+
+    results = _run_in_tool(run)
+
+    assert results == [(f"{i}\n", "", i) for i in range(5)]
+
+
+def test_session_restarts_after_timeout(monkeypatch):
+    monkeypatch.setattr(computer, "_EXEC_TIMEOUT", 0.2)
+
+    async def run(tool):
+        with pytest.raises(RuntimeError, match="timed out"):
+            await tool._run_command(["sleep", "5"])
+        assert tool._session is None
+        return await tool._run_command(["echo", "again"])
+
+    assert _run_in_tool(run) == ("again\n", "", 0)
+
+
+def test_session_restarts_after_cancellation():
+    async def run(tool):
+        task = asyncio.create_task(tool._run_command(["sleep", "5"]))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert tool._session is None
+        return await tool._run_command(["echo", "again"])
+
+    assert _run_in_tool(run) == ("again\n", "", 0)
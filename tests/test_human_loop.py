@@ -0,0 +1,57 @@
+"""Tests for human-in-the-loop prompting."""
+
+import asyncio
+import os
+import signal
+import threading
+
+from computer_use_agent import human_loop
+from computer_use_agent.human_loop import HumanLoopHandler
+
+
+class FakePrompt:
+    """Blocking prompt whose answers are fed in by the test."""
+
+    answers: list[str] = []
+    answered = threading.Event()
+    calls = 0
+
+    @staticmethod
+    def ask(*args, **kwargs) -> str:
+        FakePrompt.calls += 1
+        FakePrompt.answered.wait()
+        FakePrompt.answered.clear()
+        return FakePrompt.answers.pop(0)
+
+    @classmethod
+    def answer(cls, value: str) -> None:
+        cls.answers.append(value)
+        cls.answered.set()
+
+
+def test_ctrl_c_cancels_prompt_and_next_prompt_takes_over_its_thread(monkeypatch):
+    # Installed as a classmethod like the real Prompt.ask, so every access
+    # yields a new bound method object
+    monkeypatch.setattr(human_loop.Prompt, "ask", classmethod(FakePrompt.ask))
+    monkeypatch.setattr(human_loop, "_abandoned_prompt", None)
+    FakePrompt.calls = 0
+
+    async def run() -> tuple:
+        handler = HumanLoopHandler()
+        loop = asyncio.get_running_loop()
+
+        loop.call_later(0.1, os.kill, os.getpid(), signal.SIGINT)
+        cancelled = await handler.prompt_username("Example")
+
+        loop.call_later(0.1, FakePrompt.answer, "123456")
+        answered = await handler.prompt_2fa_code()
+        return cancelled, answered
+
+    cancelled, answered = asyncio.run(run())
+
+    assert cancelled.cancelled
+    assert answered.value == "123456"
+    assert not answered.cancelled
+    # The second prompt was answered by the thread left blocked by the first
+    assert FakePrompt.calls == 1
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler